@@ -1,8 +1,9 @@
+import asyncio
 import sys
 from pathlib import Path
 
 try:
-    from fastapi import FastAPI  # type: ignore[import-not-found]
+    from fastapi import FastAPI, HTTPException  # type: ignore[import-not-found]
 except Exception as exc:
     raise ImportError("Missing dependency: fastapi. Install with: pip install fastapi uvicorn") from exc
 
@@ -16,8 +17,8 @@ PROJECT_ROOT = Path(__file__).resolve().parents[1]
 if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
-from app.cli import run_pipeline
-from app.db import fetchone
+from app.async_pipeline import run_pipeline_async
+from app.state import get_claim_state, get_claim_summary, list_claim_states
 
 
 app = FastAPI(title="Claims IDP API")
@@ -29,28 +30,45 @@ class ProcessRequest(BaseModel):
     claim_type: str
     input_folder: str
     incident_description: str | None = None
+    # True/False forces per-claim profiling on/off; None defers to PROFILE_CLAIMS
+    profile: bool | None = None
 
 
 @app.post("/process")
-def process_claim(req: ProcessRequest):
-    run_pipeline(
+async def process_claim(req: ProcessRequest):
+    await run_pipeline_async(
         claim_number=req.claim_number,
         policy_holder=req.policy_holder,
         claim_type=req.claim_type,
         input_folder=req.input_folder,
         incident_description=req.incident_description,
+        profile=req.profile,
     )
     return {"status": "ok", "claim_number": req.claim_number}
 
 
 @app.get("/summary/{claim_number}")
-def get_summary(claim_number: str):
-    row = fetchone(
-        "SELECT details FROM audit_logs WHERE action=%s AND claim_id=(SELECT id FROM claims WHERE claim_number=%s) ORDER BY id DESC LIMIT 1",
-        ("llm_summary_generated", claim_number),
+async def get_summary(claim_number: str):
+    return {"summary": await asyncio.to_thread(get_claim_summary, claim_number)}
+
+
+@app.get("/claims")
+async def list_claims(
+    limit: int = 50,
+    after_id: int = 0,
+    risk_level: str | None = None,
+    claim_type: str | None = None,
+    min_score: int | None = None,
+    include_fields: bool = False,
+):
+    return await asyncio.to_thread(
+        list_claim_states, limit, after_id, risk_level, claim_type, min_score, include_fields
     )
-    if not row:
-        return {"summary": None}
-    return {"summary": row["details"] if isinstance(row, dict) else row[0]}
 
 
+@app.get("/claims/{claim_number}")
+async def get_claim(claim_number: str):
+    state = await asyncio.to_thread(get_claim_state, claim_number)
+    if state is None:
+        raise HTTPException(status_code=404, detail="claim not found")
+    return state
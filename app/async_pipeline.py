@@ -0,0 +1,54 @@
+import asyncio
+from typing import Dict, List
+
+from .db import fetchall_async
+from .ingest import discover_documents
+from .profiling import profile_claim_async, span
+from .steps import (
+    COLLECT_DOCUMENTS_SQL,
+    STRUCTURED_FIELDS_SQL,
+    document_texts,
+    gather_or_cancel,
+    group_fields,
+    process_document_async,
+    record_profile_async,
+    score_claim_fields_async,
+    summarize_claim_async,
+    upsert_claim_async,
+)
+
+
+async def build_structured_map_async(claim_id: int) -> Dict[str, List[str]]:
+    return group_fields(await fetchall_async(STRUCTURED_FIELDS_SQL, (claim_id,)))
+
+
+async def collect_documents_async(claim_id: int) -> List[str]:
+    return document_texts(await fetchall_async(COLLECT_DOCUMENTS_SQL, (claim_id,)))
+
+
+async def run_pipeline_async(claim_number: str, policy_holder: str, claim_type: str, input_folder: str, incident_description: str | None = None, policy_number: str | None = None, profile: bool | None = None, **_ignored) -> str:
+    """Async variant of app.cli.run_pipeline; returns the summary instead of printing it."""
+    prof = claim_id = None
+    try:
+        async with profile_claim_async(claim_number, profile) as prof:
+            claim_id, summary = await _run_pipeline_async(claim_number, policy_holder, claim_type, input_folder, incident_description, policy_number)
+    finally:
+        await record_profile_async(prof, claim_id, claim_number)
+    return summary
+
+
+async def _run_pipeline_async(claim_number: str, policy_holder: str, claim_type: str, input_folder: str, incident_description: str | None, policy_number: str | None):
+    claim = {
+        "claim_number": claim_number, "policy_holder": policy_holder, "claim_type": claim_type,
+        "incident_description": incident_description, "policy_number": policy_number,
+    }
+    claim_id = await upsert_claim_async(claim)
+
+    with span("ingest"):
+        paths = await asyncio.to_thread(discover_documents, input_folder)
+        # Documents run concurrently; one failing cancels the others
+        await gather_or_cancel(*(process_document_async(claim_id, p) for p in paths))
+
+    structured, scored = await score_claim_fields_async(claim_id, claim)
+    summary = await summarize_claim_async(claim_id, claim, structured, scored)
+    return claim_id, summary
@@ -1,6 +1,12 @@
 import os
 import json
-from typing import Any, Dict, Iterable, Optional, Tuple
+import asyncio
+import atexit
+import logging
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 
 # Optional MySQL; fallback to SQLite when unavailable
 MYSQL_AVAILABLE = False
@@ -12,9 +18,25 @@ except Exception:
 
 import sqlite3
 
+from .profiling import span
+
 
 USE_SQLITE = os.getenv("USE_SQLITE", "1" if not MYSQL_AVAILABLE else "0") == "1"
 
+# High-throughput SQLite mode: WAL journal, tuned pragmas, one writer thread
+# that group-commits queued writes, and per-thread query-only readers.
+# Set SQLITE_FAST=0 to fall back to a fresh connection per call.
+SQLITE_FAST = os.getenv("SQLITE_FAST", "1") == "1"
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_WRITE_BATCH = int(os.getenv("SQLITE_WRITE_BATCH", "256"))
+
+logger = logging.getLogger(__name__)
+
+# Bumped whenever _ensure_sqlite_schema gains a one-time data migration
+_SQLITE_SCHEMA_VERSION = 2
+
 
 def _ensure_sqlite_schema(conn: sqlite3.Connection) -> None:
     conn.executescript(
@@ -68,9 +90,76 @@ def _ensure_sqlite_schema(conn: sqlite3.Connection) -> None:
           details TEXT NULL,
           created_at TEXT NOT NULL DEFAULT (datetime('now'))
         );
+
+        CREATE TABLE IF NOT EXISTS claim_state (
+          claim_id INTEGER PRIMARY KEY,
+          claim_number TEXT NOT NULL,
+          policy_holder TEXT NOT NULL,
+          claim_type TEXT NOT NULL,
+          score_id INTEGER NULL,
+          score INTEGER NULL,
+          risk_level TEXT NULL,
+          rule_hits TEXT NULL,
+          summary_audit_id INTEGER NULL,
+          document_count INTEGER NOT NULL DEFAULT 0,
+          updated_at TEXT NOT NULL DEFAULT (datetime('now')),
+          FOREIGN KEY (claim_id) REFERENCES claims(id) ON DELETE CASCADE
+        );
+        CREATE INDEX IF NOT EXISTS idx_claim_state_risk ON claim_state (risk_level, claim_id);
+
+        CREATE TABLE IF NOT EXISTS claim_state_fields (
+          claim_id INTEGER NOT NULL,
+          field_name TEXT NOT NULL,
+          field_value TEXT NOT NULL,
+          PRIMARY KEY (claim_id, field_name, field_value),
+          FOREIGN KEY (claim_id) REFERENCES claims(id) ON DELETE CASCADE
+        );
+
+        CREATE TABLE IF NOT EXISTS dead_letters (
+          id INTEGER PRIMARY KEY AUTOINCREMENT,
+          claim_id INTEGER NULL,
+          document_id INTEGER NULL,
+          file_name TEXT NOT NULL,
+          file_sha256 TEXT NOT NULL,
+          reason TEXT NOT NULL,
+          failure_kind TEXT NOT NULL DEFAULT 'error',
+          attempts INTEGER NOT NULL,
+          released INTEGER NOT NULL DEFAULT 0,
+          created_at TEXT NOT NULL DEFAULT (datetime('now'))
+        );
+        CREATE INDEX IF NOT EXISTS idx_dead_letters_sha ON dead_letters (file_sha256);
+
+        CREATE TABLE IF NOT EXISTS export_watermarks (
+          name TEXT PRIMARY KEY,
+          last_id INTEGER NOT NULL,
+          last_created_at TEXT NULL,
+          updated_at TEXT NOT NULL DEFAULT (datetime('now'))
+        );
         """
     )
-    conn.commit()
+    if conn.execute("PRAGMA user_version").fetchone()[0] >= _SQLITE_SCHEMA_VERSION:
+        return
+    # Migrations run once per database file; re-check under the write lock in
+    # case another connection got there first.
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version < 1 and conn.execute("SELECT 1 FROM claims LIMIT 1").fetchone():
+            # claim_state was added to an existing database: backfill it
+            cur = conn.cursor()
+            for kind, query, params in _claim_state_rebuild_sql():
+                _run_step(cur, kind, _adapt_query(query), params, 0)
+        columns = {r[1] for r in conn.execute("PRAGMA table_info(dead_letters)")}
+        if version < 2 and "failure_kind" not in columns:
+            # dead_letters predates failure kinds: older rows stay 'error' and
+            # so no longer count toward quarantine
+            conn.execute("ALTER TABLE dead_letters ADD COLUMN failure_kind TEXT NOT NULL DEFAULT 'error'")
+            conn.execute("ALTER TABLE dead_letters ADD COLUMN released INTEGER NOT NULL DEFAULT 0")
+        conn.execute(f"PRAGMA user_version={_SQLITE_SCHEMA_VERSION}")
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
 
 
 def get_db_connection():
@@ -82,81 +171,551 @@ def get_db_connection():
             password=os.getenv("MYSQL_PASSWORD", "root123"),
             database=os.getenv("MYSQL_DATABASE", "insurance")
         )
-    db_path = os.getenv("SQLITE_PATH", os.path.join(os.path.dirname(__file__), "..", "insurance.db"))
-    conn = sqlite3.connect(db_path)
+    conn = sqlite3.connect(_sqlite_path())
     conn.row_factory = sqlite3.Row
     _ensure_sqlite_schema(conn)
     return conn
 
 
+def _sqlite_path() -> str:
+    return os.getenv("SQLITE_PATH", os.path.join(os.path.dirname(__file__), "..", "insurance.db"))
+
+
+def _apply_fast_pragmas(conn: sqlite3.Connection) -> None:
+    conn.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}")
+    conn.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    conn.execute("PRAGMA temp_store=MEMORY")
+
+
+class _SQLiteWriter:
+    """Single writer thread owning the only write connection to a database file.
+
+    Callers enqueue statements and block on a Future; the thread drains the
+    queue in batches and commits each batch once (group commit). Every job
+    (a statement, an executemany, or an execute_unit) runs inside its own
+    SAVEPOINT so a failing job only fails its own caller and does not roll
+    back the rest of the batch.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.pid = os.getpid()
+        self._queue: "queue.Queue[Optional[Tuple[str, str, Any, Future]]]" = queue.Queue()
+        self._ready: Future = Future()
+        self._closed = False
+        self._closed_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="sqlite-writer", daemon=True)
+        self._thread.start()
+        # Schema and journal mode must exist before readers open the file
+        self._ready.result()
+
+    def submit(self, kind: str, query: str, params: Any) -> Future:
+        fut: Future = Future()
+        with self._closed_lock:
+            if self._closed:
+                raise RuntimeError(f"SQLite writer for {self.db_path} has stopped")
+            self._queue.put((kind, query, params, fut))
+        return fut
+
+    def is_alive(self) -> bool:
+        return not self._closed and self._thread.is_alive()
+
+    def stop(self) -> None:
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout=5)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        _apply_fast_pragmas(conn)
+        _ensure_sqlite_schema(conn)
+        return conn
+
+    def _run(self) -> None:
+        try:
+            conn = self._connect()
+        except BaseException as exc:
+            self._closed = True
+            self._ready.set_exception(exc)
+            return
+        self._ready.set_result(None)
+        try:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    return
+                batch = [item]
+                stop = False
+                while len(batch) < SQLITE_WRITE_BATCH:
+                    try:
+                        nxt = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if nxt is None:
+                        stop = True
+                        break
+                    batch.append(nxt)
+                try:
+                    self._commit_batch(conn, batch)
+                except BaseException as exc:
+                    for _, _, _, fut in batch:
+                        if not fut.done():
+                            fut.set_exception(exc)
+                    # The connection is in an unknown state; exit and let
+                    # _get_writer start a fresh writer on the next call.
+                    logger.exception("SQLite writer for %s stopped", self.db_path)
+                    return
+                if stop:
+                    return
+        finally:
+            # Refuse new work, then fail whatever is still queued so no caller
+            # blocks forever on a writer that is gone.
+            with self._closed_lock:
+                self._closed = True
+            while True:
+                try:
+                    pending = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if pending is not None:
+                    pending[3].set_exception(RuntimeError(f"SQLite writer for {self.db_path} has stopped"))
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    def _commit_batch(self, conn: sqlite3.Connection, batch: List[Tuple[str, str, Any, Future]]) -> None:
+        results: List[Tuple[Future, Any, Optional[BaseException]]] = []
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for kind, query, params, fut in batch:
+                conn.execute("SAVEPOINT stmt")
+                try:
+                    cur = conn.cursor()
+                    if kind == "many":
+                        cur.executemany(query, params)
+                        value: Any = None
+                    elif kind == "unit":
+                        value = _run_unit(cur, params)
+                    else:
+                        cur.execute(query, params)
+                        value = int(cur.lastrowid or 0)
+                    conn.execute("RELEASE stmt")
+                    results.append((fut, value, None))
+                except Exception as exc:
+                    conn.execute("ROLLBACK TO stmt")
+                    conn.execute("RELEASE stmt")
+                    results.append((fut, None, exc))
+            conn.execute("COMMIT")
+        except Exception as exc:
+            for _, _, _, fut in batch:
+                fut.set_exception(exc)
+            # A failed ROLLBACK leaves the connection unusable; let it raise so
+            # the writer thread exits and _get_writer starts a fresh writer.
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            return
+        for fut, value, err in results:
+            if err is not None:
+                fut.set_exception(err)
+            else:
+                fut.set_result(value)
+
+
+_writers: Dict[str, _SQLiteWriter] = {}
+_writers_lock = threading.Lock()
+_readers = threading.local()
+
+
+def _get_writer() -> _SQLiteWriter:
+    db_path = os.path.abspath(_sqlite_path())
+    with _writers_lock:
+        writer = _writers.get(db_path)
+        # Threads do not survive fork; a child process needs its own writer.
+        # A writer whose thread died is replaced as well.
+        if writer is None or writer.pid != os.getpid() or not writer.is_alive():
+            writer = _SQLiteWriter(db_path)
+            _writers[db_path] = writer
+        return writer
+
+
+def _get_reader() -> sqlite3.Connection:
+    writer = _get_writer()
+    conns: Dict[str, sqlite3.Connection] = getattr(_readers, "conns", None) or {}
+    _readers.conns = conns
+    conn = conns.get(writer.db_path)
+    if conn is None:
+        conn = sqlite3.connect(writer.db_path)
+        conn.row_factory = sqlite3.Row
+        _apply_fast_pragmas(conn)
+        conn.execute("PRAGMA query_only=1")
+        conns[writer.db_path] = conn
+    return conn
+
+
+def _run_step(cur: Any, kind: str, query: str, params: Any, first_id: int) -> None:
+    if kind == "many":
+        cur.executemany(query, params)
+    else:
+        cur.execute(query, tuple(first_id if p is FIRST_ID else p for p in params))
+
+
+def _run_unit(cur: Any, steps: List[Tuple[str, str, Any]]) -> int:
+    """Run (kind, query, params) steps on one cursor; returns the first statement's lastrowid.
+
+    FIRST_ID in a later step's params is replaced by that id, so a base row
+    and the claim_state row derived from it can be written together.
+    """
+    first_id = 0
+    for i, (kind, query, params) in enumerate(steps):
+        _run_step(cur, kind, query, params, first_id)
+        if i == 0 and kind != "many":
+            first_id = int(cur.lastrowid or 0)
+    return first_id
+
+
+def _submit_write(kind: str, query: str, params: Any) -> Any:
+    return _get_writer().submit(kind, query, params).result()
+
+
+@atexit.register
+def _stop_writers() -> None:
+    for writer in list(_writers.values()):
+        if writer.pid == os.getpid():
+            writer.stop()
+
+
 def _adapt_query(query: str) -> str:
     if USE_SQLITE:
         return "?".join(query.split("%s"))
     return query
 
 
-def execute(query: str, params: Optional[Tuple[Any, ...]] = None) -> int:
-    conn = get_db_connection()
-    try:
-        if USE_SQLITE:
+# Placeholder for the id generated by the first statement of an execute_unit
+FIRST_ID = object()
+
+
+def execute_unit(steps: Iterable[Tuple[str, str, Any]]) -> int:
+    """Run (kind, query, params) steps atomically; kind is "one" or "many".
+
+    Fast SQLite runs the whole unit as one writer job inside a single
+    SAVEPOINT; otherwise the steps share one connection and one commit.
+    Returns the id generated by the first step.
+    """
+    steps = [(kind, _adapt_query(query), list(params) if kind == "many" else params or ()) for kind, query, params in steps]
+    with span("db.execute_unit", sql=steps[0][1]):
+        if USE_SQLITE and SQLITE_FAST:
+            return int(_submit_write("unit", "", steps))
+        conn = get_db_connection()
+        try:
             cur = conn.cursor()
-            cur.execute(_adapt_query(query), params or ())
-            conn.commit()
-            return int(cur.lastrowid or 0)
-        else:
-            with conn.cursor() as cur:  # type: ignore[attr-defined]
-                cur.execute(query, params or ())
+            try:
+                first_id = _run_unit(cur, steps)
                 conn.commit()
-                return cur.lastrowid or 0
-    finally:
-        conn.close()
+                return first_id
+            except BaseException:
+                conn.rollback()
+                raise
+            finally:
+                cur.close()
+        finally:
+            conn.close()
+
+
+def execute(query: str, params: Optional[Tuple[Any, ...]] = None) -> int:
+    with span("db.execute", sql=query):
+        if USE_SQLITE and SQLITE_FAST:
+            return int(_submit_write("one", _adapt_query(query), params or ()))
+        conn = get_db_connection()
+        try:
+            if USE_SQLITE:
+                cur = conn.cursor()
+                cur.execute(_adapt_query(query), params or ())
+                conn.commit()
+                return int(cur.lastrowid or 0)
+            else:
+                with conn.cursor() as cur:  # type: ignore[attr-defined]
+                    cur.execute(query, params or ())
+                    conn.commit()
+                    return cur.lastrowid or 0
+        finally:
+            conn.close()
 
 
 def executemany(query: str, seq_params: Iterable[Tuple[Any, ...]]) -> None:
-    conn = get_db_connection()
-    try:
-        if USE_SQLITE:
-            cur = conn.cursor()
-            cur.executemany(_adapt_query(query), list(seq_params))
-            conn.commit()
-        else:
-            with conn.cursor() as cur:  # type: ignore[attr-defined]
-                cur.executemany(query, list(seq_params))
+    with span("db.executemany", sql=query):
+        if USE_SQLITE and SQLITE_FAST:
+            _submit_write("many", _adapt_query(query), list(seq_params))
+            return
+        conn = get_db_connection()
+        try:
+            if USE_SQLITE:
+                cur = conn.cursor()
+                cur.executemany(_adapt_query(query), list(seq_params))
                 conn.commit()
-    finally:
-        conn.close()
+            else:
+                with conn.cursor() as cur:  # type: ignore[attr-defined]
+                    cur.executemany(query, list(seq_params))
+                    conn.commit()
+        finally:
+            conn.close()
 
 
 def fetchone(query: str, params: Optional[Tuple[Any, ...]] = None):
-    conn = get_db_connection()
-    try:
-        if USE_SQLITE:
-            cur = conn.cursor()
-            cur.execute(_adapt_query(query), params or ())
-            row = cur.fetchone()
+    with span("db.fetchone", sql=query):
+        if USE_SQLITE and SQLITE_FAST:
+            cur = _get_reader().cursor()
+            try:
+                cur.execute(_adapt_query(query), params or ())
+                row = cur.fetchone()
+            finally:
+                # Closing ends the implicit read snapshot so later reads see new commits
+                cur.close()
             return dict(row) if row is not None else None
-        else:
-            with conn.cursor(dictionary=True) as cur:  # type: ignore[attr-defined]
-                cur.execute(query, params or ())
-                return cur.fetchone()
-    finally:
-        conn.close()
+        conn = get_db_connection()
+        try:
+            if USE_SQLITE:
+                cur = conn.cursor()
+                cur.execute(_adapt_query(query), params or ())
+                row = cur.fetchone()
+                return dict(row) if row is not None else None
+            else:
+                with conn.cursor(dictionary=True) as cur:  # type: ignore[attr-defined]
+                    cur.execute(query, params or ())
+                    return cur.fetchone()
+        finally:
+            conn.close()
 
 
 def fetchall(query: str, params: Optional[Tuple[Any, ...]] = None):
-    conn = get_db_connection()
-    try:
-        if USE_SQLITE:
-            cur = conn.cursor()
-            cur.execute(_adapt_query(query), params or ())
-            rows = cur.fetchall()
+    with span("db.fetchall", sql=query):
+        if USE_SQLITE and SQLITE_FAST:
+            rows = _get_reader().execute(_adapt_query(query), params or ()).fetchall()
             return [dict(r) for r in rows]
+        conn = get_db_connection()
+        try:
+            if USE_SQLITE:
+                cur = conn.cursor()
+                cur.execute(_adapt_query(query), params or ())
+                rows = cur.fetchall()
+                return [dict(r) for r in rows]
+            else:
+                with conn.cursor(dictionary=True) as cur:  # type: ignore[attr-defined]
+                    cur.execute(query, params or ())
+                    return cur.fetchall()
+        finally:
+            conn.close()
+
+
+def iter_rows(query: str, params: Optional[Tuple[Any, ...]] = None, batch_size: int = 1000) -> Iterator[List[Dict[str, Any]]]:
+    """Stream a SELECT in fetchmany batches on a dedicated connection.
+
+    MySQL uses an unbuffered (server-side) cursor so rows are not
+    materialized client-side; SQLite steps its cursor lazily.
+    """
+    if USE_SQLITE:
+        conn = sqlite3.connect(_sqlite_path())
+        conn.row_factory = sqlite3.Row
+        if SQLITE_FAST:
+            _get_writer()  # make sure schema/WAL are in place
+            _apply_fast_pragmas(conn)
+            conn.execute("PRAGMA query_only=1")
         else:
-            with conn.cursor(dictionary=True) as cur:  # type: ignore[attr-defined]
+            _ensure_sqlite_schema(conn)
+        try:
+            cur = conn.cursor()
+            cur.execute(_adapt_query(query), params or ())
+            while True:
+                rows = cur.fetchmany(batch_size)
+                if not rows:
+                    return
+                yield [dict(r) for r in rows]
+        finally:
+            conn.close()
+    else:
+        conn = get_db_connection()
+        try:
+            cur = conn.cursor(dictionary=True, buffered=False)  # type: ignore[attr-defined]
+            try:
                 cur.execute(query, params or ())
-                return cur.fetchall()
-    finally:
-        conn.close()
+                while True:
+                    rows = cur.fetchmany(batch_size)
+                    if not rows:
+                        return
+                    yield rows
+            finally:
+                cur.close()
+        finally:
+            conn.close()
+
+
+async def execute_async(query: str, params: Optional[Tuple[Any, ...]] = None) -> int:
+    with span("db.execute", sql=query):
+        # Fast-mode writes are awaited on the writer's Future without holding a thread
+        if USE_SQLITE and SQLITE_FAST:
+            fut = _get_writer().submit("one", _adapt_query(query), params or ())
+            return int(await asyncio.wrap_future(fut))
+        return await asyncio.to_thread(execute, query, params)
+
+
+async def executemany_async(query: str, seq_params: Iterable[Tuple[Any, ...]]) -> None:
+    with span("db.executemany", sql=query):
+        if USE_SQLITE and SQLITE_FAST:
+            fut = _get_writer().submit("many", _adapt_query(query), list(seq_params))
+            await asyncio.wrap_future(fut)
+            return
+        await asyncio.to_thread(executemany, query, list(seq_params))
+
+
+async def execute_unit_async(steps: Iterable[Tuple[str, str, Any]]) -> int:
+    steps = list(steps)
+    if USE_SQLITE and SQLITE_FAST:
+        adapted = [(kind, _adapt_query(query), list(params) if kind == "many" else params or ()) for kind, query, params in steps]
+        with span("db.execute_unit", sql=adapted[0][1]):
+            return int(await asyncio.wrap_future(_get_writer().submit("unit", "", adapted)))
+    return await asyncio.to_thread(execute_unit, steps)
+
+
+async def fetchone_async(query: str, params: Optional[Tuple[Any, ...]] = None):
+    return await asyncio.to_thread(fetchone, query, params)
+
+
+async def fetchall_async(query: str, params: Optional[Tuple[Any, ...]] = None):
+    return await asyncio.to_thread(fetchall, query, params)
+
+
+_INSERT_CLAIM_SQL = "INSERT INTO claims (claim_number, policy_holder, claim_type, incident_description) VALUES (%s,%s,%s,%s)"
+_UPDATE_CLAIM_SQL = "UPDATE claims SET policy_holder=%s, claim_type=%s, incident_description=%s WHERE id=%s"
+_INSERT_DOCUMENT_SQL = "INSERT INTO documents (claim_id, file_name, file_type, content_text) VALUES (%s,%s,%s,%s)"
+_INSERT_EXTRACTED_FIELD_SQL = "INSERT INTO extracted_fields (claim_id, document_id, field_name, field_value, confidence) VALUES (%s,%s,%s,%s,%s)"
+_INSERT_FRAUD_SCORE_SQL = "INSERT INTO fraud_scores (claim_id, score, risk_level, rule_hits) VALUES (%s,%s,%s,%s)"
+_INSERT_AUDIT_SQL = "INSERT INTO audit_logs (claim_id, document_id, action, details) VALUES (%s,%s,%s,%s)"
+_INSERT_DEAD_LETTER_SQL = (
+    "INSERT INTO dead_letters (claim_id, document_id, file_name, file_sha256, reason, failure_kind, attempts) "
+    "VALUES (%s,%s,%s,%s,%s,%s,%s)"
+)
+_RELEASE_DEAD_LETTERS_SQL = "UPDATE dead_letters SET released=1 WHERE file_sha256=%s AND released=0"
+
+# claim_state / claim_state_fields hold the latest view of each claim and are
+# updated alongside every write below, so readers never regroup history.
+SUMMARY_ACTION = "llm_summary_generated"
+_STATE_UPDATE_CLAIM_SQL = "UPDATE claim_state SET policy_holder=%s, claim_type=%s, updated_at=CURRENT_TIMESTAMP WHERE claim_id=%s"
+_STATE_DOCUMENT_SQL = "UPDATE claim_state SET document_count=document_count+1, updated_at=CURRENT_TIMESTAMP WHERE claim_id=%s"
+_STATE_SCORE_SQL = (
+    "UPDATE claim_state SET score_id=%s, score=%s, risk_level=%s, rule_hits=%s, updated_at=CURRENT_TIMESTAMP "
+    "WHERE claim_id=%s AND (score_id IS NULL OR score_id < %s)"
+)
+_STATE_SUMMARY_SQL = (
+    "UPDATE claim_state SET summary_audit_id=%s, updated_at=CURRENT_TIMESTAMP "
+    "WHERE claim_id=%s AND (summary_audit_id IS NULL OR summary_audit_id < %s)"
+)
+
+
+def _insert_ignore() -> str:
+    return "INSERT OR IGNORE" if USE_SQLITE else "INSERT IGNORE"
+
+
+def _state_insert_sql() -> str:
+    # An upsert, so a claim_state row left by a backfill or rebuild is refreshed
+    base = "INSERT INTO claim_state (claim_id, claim_number, policy_holder, claim_type) VALUES (%s,%s,%s,%s)"
+    if USE_SQLITE:
+        return base + (
+            " ON CONFLICT(claim_id) DO UPDATE SET claim_number=excluded.claim_number, "
+            "policy_holder=excluded.policy_holder, claim_type=excluded.claim_type, updated_at=CURRENT_TIMESTAMP"
+        )
+    return base + (
+        " ON DUPLICATE KEY UPDATE claim_number=VALUES(claim_number), "
+        "policy_holder=VALUES(policy_holder), claim_type=VALUES(claim_type), updated_at=CURRENT_TIMESTAMP"
+    )
+
+
+def _state_field_sql() -> str:
+    return f"{_insert_ignore()} INTO claim_state_fields (claim_id, field_name, field_value) VALUES (%s,%s,%s)"
+
+
+def _claim_state_rebuild_sql() -> List[Tuple[str, str, Tuple[Any, ...]]]:
+    return [
+        ("one", "DELETE FROM claim_state_fields", ()),
+        ("one", "DELETE FROM claim_state", ()),
+        (
+            "one",
+            "INSERT INTO claim_state (claim_id, claim_number, policy_holder, claim_type, document_count) "
+            "SELECT c.id, c.claim_number, c.policy_holder, c.claim_type, "
+            "(SELECT COUNT(*) FROM documents d WHERE d.claim_id=c.id) FROM claims c",
+            (),
+        ),
+        ("one", "UPDATE claim_state SET score_id=(SELECT MAX(f.id) FROM fraud_scores f WHERE f.claim_id=claim_state.claim_id)", ()),
+        (
+            "one",
+            "UPDATE claim_state SET "
+            "score=(SELECT f.score FROM fraud_scores f WHERE f.id=claim_state.score_id), "
+            "risk_level=(SELECT f.risk_level FROM fraud_scores f WHERE f.id=claim_state.score_id), "
+            "rule_hits=(SELECT f.rule_hits FROM fraud_scores f WHERE f.id=claim_state.score_id)",
+            (),
+        ),
+        (
+            "one",
+            "UPDATE claim_state SET summary_audit_id=(SELECT MAX(a.id) FROM audit_logs a "
+            "WHERE a.claim_id=claim_state.claim_id AND a.action=%s)",
+            (SUMMARY_ACTION,),
+        ),
+        (
+            "one",
+            f"{_insert_ignore()} INTO claim_state_fields (claim_id, field_name, field_value) "
+            "SELECT DISTINCT claim_id, field_name, field_value FROM extracted_fields",
+            (),
+        ),
+    ]
+
+
+def rebuild_claim_state() -> None:
+    """Recompute claim_state from the base tables (backfill or repair).
+
+    Runs as one transaction, so readers never see the tables half rebuilt.
+    """
+    execute_unit(_claim_state_rebuild_sql())
+
+
+# Each base write and its claim_state write form one unit (see execute_unit)
+
+def _insert_claim_steps(claim_number: str, policy_holder: str, claim_type: str, incident_description: Optional[str]):
+    return [
+        ("one", _INSERT_CLAIM_SQL, (claim_number, policy_holder, claim_type, incident_description)),
+        ("one", _state_insert_sql(), (FIRST_ID, claim_number, policy_holder, claim_type)),
+    ]
+
+
+def _update_claim_steps(claim_id: int, policy_holder: str, claim_type: str, incident_description: Optional[str]):
+    return [
+        ("one", _UPDATE_CLAIM_SQL, (policy_holder, claim_type, incident_description, claim_id)),
+        ("one", _STATE_UPDATE_CLAIM_SQL, (policy_holder, claim_type, claim_id)),
+    ]
+
+
+def _insert_document_steps(claim_id: int, file_name: str, file_type: str, content_text: Optional[str]):
+    return [
+        ("one", _INSERT_DOCUMENT_SQL, (claim_id, file_name, file_type, content_text)),
+        ("one", _STATE_DOCUMENT_SQL, (claim_id,)),
+    ]
+
+
+def _insert_fraud_score_steps(claim_id: int, score: int, risk_level: str, rule_hits: Dict[str, Any]):
+    hits_json = json.dumps(rule_hits)
+    return [
+        ("one", _INSERT_FRAUD_SCORE_SQL, (claim_id, score, risk_level, hits_json)),
+        ("one", _STATE_SCORE_SQL, (FIRST_ID, score, risk_level, hits_json, claim_id, FIRST_ID)),
+    ]
+
+
+def _log_audit_steps(action: str, details: str, claim_id: Optional[int], document_id: Optional[int]):
+    steps = [("one", _INSERT_AUDIT_SQL, (claim_id, document_id, action, details))]
+    if action == SUMMARY_ACTION and claim_id is not None:
+        steps.append(("one", _STATE_SUMMARY_SQL, (FIRST_ID, claim_id, FIRST_ID)))
+    return steps
 
 
 def get_claim_id_by_number(claim_number: str) -> Optional[int]:
@@ -168,37 +727,102 @@ def get_claim_id_by_number(claim_number: str) -> Optional[int]:
 
 
 def insert_claim(claim_number: str, policy_holder: str, claim_type: str, incident_description: Optional[str]) -> int:
-    return execute(
-        "INSERT INTO claims (claim_number, policy_holder, claim_type, incident_description) VALUES (%s,%s,%s,%s)",
-        (claim_number, policy_holder, claim_type, incident_description),
-    )
+    return execute_unit(_insert_claim_steps(claim_number, policy_holder, claim_type, incident_description))
+
+
+def update_claim(claim_id: int, policy_holder: str, claim_type: str, incident_description: Optional[str]) -> None:
+    execute_unit(_update_claim_steps(claim_id, policy_holder, claim_type, incident_description))
 
 
 def insert_document(claim_id: int, file_name: str, file_type: str, content_text: Optional[str]) -> int:
-    return execute(
-        "INSERT INTO documents (claim_id, file_name, file_type, content_text) VALUES (%s,%s,%s,%s)",
-        (claim_id, file_name, file_type, content_text),
-    )
+    return execute_unit(_insert_document_steps(claim_id, file_name, file_type, content_text))
 
 
 def insert_extracted_field(claim_id: int, field_name: str, field_value: str, confidence: Optional[float], document_id: Optional[int] = None) -> int:
-    return execute(
-        "INSERT INTO extracted_fields (claim_id, document_id, field_name, field_value, confidence) VALUES (%s,%s,%s,%s,%s)",
-        (claim_id, document_id, field_name, field_value, confidence),
-    )
+    return execute_unit([
+        ("one", _INSERT_EXTRACTED_FIELD_SQL, (claim_id, document_id, field_name, field_value, confidence)),
+        ("one", _state_field_sql(), (claim_id, field_name, field_value)),
+    ])
 
 
 def insert_fraud_score(claim_id: int, score: int, risk_level: str, rule_hits: Dict[str, Any]):
-    return execute(
-        "INSERT INTO fraud_scores (claim_id, score, risk_level, rule_hits) VALUES (%s,%s,%s,%s)",
-        (claim_id, score, risk_level, json.dumps(rule_hits)),
-    )
+    return execute_unit(_insert_fraud_score_steps(claim_id, score, risk_level, rule_hits))
 
 
 def log_audit(action: str, details: str, claim_id: Optional[int] = None, document_id: Optional[int] = None):
-    return execute(
-        "INSERT INTO audit_logs (claim_id, document_id, action, details) VALUES (%s,%s,%s,%s)",
-        (claim_id, document_id, action, details),
-    )
+    return execute_unit(_log_audit_steps(action, details, claim_id, document_id))
+
+
+def _count_dead_letters_query(file_sha256: str, kinds: Sequence[str], within_hours: float) -> Tuple[str, Tuple[Any, ...]]:
+    # Released rows and rows older than within_hours (0 = no expiry) are ignored
+    placeholders = ",".join(["%s"] * len(kinds))
+    query = f"SELECT COUNT(*) AS n FROM dead_letters WHERE file_sha256=%s AND released=0 AND failure_kind IN ({placeholders})"
+    params: Tuple[Any, ...] = (file_sha256, *kinds)
+    if within_hours > 0:
+        if USE_SQLITE:
+            query += " AND created_at >= datetime('now', %s)"
+            params += (f"-{within_hours} hours",)
+        else:
+            query += " AND created_at >= NOW() - INTERVAL %s SECOND"
+            params += (int(within_hours * 3600),)
+    return query, params
+
+
+def insert_dead_letter(claim_id: Optional[int], document_id: Optional[int], file_name: str, file_sha256: str, reason: str, failure_kind: str, attempts: int) -> int:
+    return execute(_INSERT_DEAD_LETTER_SQL, (claim_id, document_id, file_name, file_sha256, reason[:1000], failure_kind, attempts))
+
+
+def count_dead_letters(file_sha256: str, kinds: Sequence[str], within_hours: float = 0) -> int:
+    row = fetchone(*_count_dead_letters_query(file_sha256, kinds, within_hours))
+    return int(row["n"]) if row else 0
+
+
+def release_dead_letters(file_sha256: str) -> None:
+    """Mark a file's dead letters as released so they no longer count toward quarantine."""
+    execute(_RELEASE_DEAD_LETTERS_SQL, (file_sha256,))
+
+
+async def get_claim_id_by_number_async(claim_number: str) -> Optional[int]:
+    row = await fetchone_async("SELECT id FROM claims WHERE claim_number=%s", (claim_number,))
+    if not row:
+        return None
+    return int(row["id"]) if isinstance(row, dict) else int(row[0])
+
+
+async def insert_claim_async(claim_number: str, policy_holder: str, claim_type: str, incident_description: Optional[str]) -> int:
+    return await execute_unit_async(_insert_claim_steps(claim_number, policy_holder, claim_type, incident_description))
+
+
+async def update_claim_async(claim_id: int, policy_holder: str, claim_type: str, incident_description: Optional[str]) -> None:
+    await execute_unit_async(_update_claim_steps(claim_id, policy_holder, claim_type, incident_description))
+
+
+async def insert_document_async(claim_id: int, file_name: str, file_type: str, content_text: Optional[str]) -> int:
+    return await execute_unit_async(_insert_document_steps(claim_id, file_name, file_type, content_text))
+
+
+async def insert_extracted_fields_async(claim_id: int, document_id: Optional[int], fields: Iterable[Tuple[str, str, Optional[float]]]) -> None:
+    fields = list(fields)
+    if not fields:
+        return
+    await execute_unit_async([
+        ("many", _INSERT_EXTRACTED_FIELD_SQL, [(claim_id, document_id, n, v, c) for n, v, c in fields]),
+        ("many", _state_field_sql(), [(claim_id, n, v) for n, v, _ in fields]),
+    ])
+
+
+async def insert_fraud_score_async(claim_id: int, score: int, risk_level: str, rule_hits: Dict[str, Any]) -> int:
+    return await execute_unit_async(_insert_fraud_score_steps(claim_id, score, risk_level, rule_hits))
+
+
+async def log_audit_async(action: str, details: str, claim_id: Optional[int] = None, document_id: Optional[int] = None) -> int:
+    return await execute_unit_async(_log_audit_steps(action, details, claim_id, document_id))
+
+
+async def insert_dead_letter_async(claim_id: Optional[int], document_id: Optional[int], file_name: str, file_sha256: str, reason: str, failure_kind: str, attempts: int) -> int:
+    return await execute_async(_INSERT_DEAD_LETTER_SQL, (claim_id, document_id, file_name, file_sha256, reason[:1000], failure_kind, attempts))
 
 
+async def count_dead_letters_async(file_sha256: str, kinds: Sequence[str], within_hours: float = 0) -> int:
+    row = await fetchone_async(*_count_dead_letters_query(file_sha256, kinds, within_hours))
+    return int(row["n"]) if row else 0
@@ -0,0 +1,243 @@
+import csv
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    import pyarrow as pa  # type: ignore[import-not-found]
+    import pyarrow.parquet as pq  # type: ignore[import-not-found]
+except Exception:
+    pa = None  # type: ignore[assignment]
+    pq = None  # type: ignore[assignment]
+
+from .db import USE_SQLITE, execute, fetchone, iter_rows
+
+
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+EXPORT_ROWS_PER_FILE = int(os.getenv("EXPORT_ROWS_PER_FILE", "100000"))
+
+# Exportable tables: (query, [(column, type)]) with type in "int", "float", "str".
+# Every query selects rows with since_id < id <= max_id, ordered by id.
+EXPORTS: Dict[str, Tuple[str, List[Tuple[str, str]]]] = {
+    "claims": (
+        "SELECT id, claim_number, policy_holder, claim_type, incident_description, created_at "
+        "FROM claims WHERE id > %s AND id <= %s ORDER BY id",
+        [("id", "int"), ("claim_number", "str"), ("policy_holder", "str"), ("claim_type", "str"),
+         ("incident_description", "str"), ("created_at", "str")],
+    ),
+    "fraud_scores": (
+        "SELECT f.id, f.claim_id, c.claim_number, f.score, f.risk_level, f.rule_hits, f.created_at "
+        "FROM fraud_scores f JOIN claims c ON c.id = f.claim_id WHERE f.id > %s AND f.id <= %s ORDER BY f.id",
+        [("id", "int"), ("claim_id", "int"), ("claim_number", "str"), ("score", "int"),
+         ("risk_level", "str"), ("created_at", "str")],
+    ),
+    "extracted_fields": (
+        "SELECT id, claim_id, document_id, field_name, field_value, confidence, created_at "
+        "FROM extracted_fields WHERE id > %s AND id <= %s ORDER BY id",
+        [("id", "int"), ("claim_id", "int"), ("document_id", "int"), ("field_name", "str"),
+         ("field_value", "str"), ("confidence", "float"), ("created_at", "str")],
+    ),
+}
+
+RULE_COLUMN_PREFIX = "rule_"
+
+
+def _parse_rule_hits(raw: Any) -> Dict[str, int]:
+    if raw is None:
+        return {}
+    if isinstance(raw, dict):
+        return raw
+    try:
+        data = json.loads(raw)
+    except Exception:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def _max_id(table: str) -> int:
+    row = fetchone(f"SELECT MAX(id) AS max_id FROM {table}")
+    return int(row["max_id"]) if row and row["max_id"] is not None else 0
+
+
+def _rule_names(since_id: int, max_id: int) -> List[str]:
+    # Rule set is open-ended, so stream the JSON column once to fix the header
+    names = set()
+    for batch in iter_rows("SELECT rule_hits FROM fraud_scores WHERE id > %s AND id <= %s", (since_id, max_id), EXPORT_BATCH_SIZE):
+        for row in batch:
+            names.update(_parse_rule_hits(row["rule_hits"]).keys())
+    return sorted(names)
+
+
+def get_watermark(name: str) -> int:
+    row = fetchone("SELECT last_id FROM export_watermarks WHERE name=%s", (name,))
+    return int(row["last_id"]) if row else 0
+
+
+def set_watermark(name: str, last_id: int, last_created_at: Optional[str]) -> None:
+    if USE_SQLITE:
+        execute(
+            "INSERT INTO export_watermarks (name, last_id, last_created_at) VALUES (%s,%s,%s) "
+            "ON CONFLICT(name) DO UPDATE SET last_id=excluded.last_id, last_created_at=excluded.last_created_at, updated_at=datetime('now')",
+            (name, last_id, last_created_at),
+        )
+    else:
+        execute(
+            "INSERT INTO export_watermarks (name, last_id, last_created_at) VALUES (%s,%s,%s) "
+            "ON DUPLICATE KEY UPDATE last_id=VALUES(last_id), last_created_at=VALUES(last_created_at)",
+            (name, last_id, last_created_at),
+        )
+
+
+def stream_table(table: str, since_id: int = 0, batch_size: int = EXPORT_BATCH_SIZE) -> Tuple[List[Tuple[str, str]], Iterator[List[Dict[str, Any]]]]:
+    """Return (columns, batches) for table; fraud_scores rule_hits become rule_<name> columns.
+
+    The upper id bound is fixed before anything is read, so rows inserted
+    while exporting are left for the next run instead of being written
+    without their rule_* columns.
+    """
+    if table not in EXPORTS:
+        raise ValueError(f"Unknown export table: {table}. Choose from: {', '.join(EXPORTS)}")
+    query, columns = EXPORTS[table]
+    max_id = _max_id(table)
+    rules: List[str] = []
+    if table == "fraud_scores":
+        rules = _rule_names(since_id, max_id)
+        columns = columns + [(RULE_COLUMN_PREFIX + r, "int") for r in rules]
+
+    def batches() -> Iterator[List[Dict[str, Any]]]:
+        for batch in iter_rows(query, (since_id, max_id), batch_size):
+            if rules:
+                for row in batch:
+                    hits = _parse_rule_hits(row.get("rule_hits"))
+                    for r in rules:
+                        row[RULE_COLUMN_PREFIX + r] = int(hits.get(r, 0))
+            for row in batch:
+                if row.get("created_at") is not None:
+                    row["created_at"] = str(row["created_at"])
+            yield batch
+
+    return columns, batches()
+
+
+class _CsvSink:
+    def __init__(self, path: Path, columns: Sequence[Tuple[str, str]]):
+        self._fh = path.open("w", newline="", encoding="utf-8")
+        self._writer = csv.DictWriter(self._fh, fieldnames=[c for c, _ in columns], extrasaction="ignore")
+        self._writer.writeheader()
+
+    def write(self, rows: List[Dict[str, Any]]) -> None:
+        self._writer.writerows(rows)
+
+    def close(self) -> None:
+        self._fh.close()
+
+
+class _ParquetSink:
+    _TYPES = {"int": "int64", "float": "float64", "str": "string"}
+    # MySQL returns DECIMAL columns (e.g. confidence) as Decimal
+    _COERCE = {"int": int, "float": float, "str": str}
+
+    def __init__(self, path: Path, columns: Sequence[Tuple[str, str]]):
+        if pa is None or pq is None:
+            raise RuntimeError("pyarrow not installed. Install with: pip install pyarrow (or use --format csv)")
+        self._columns = list(columns)
+        self._schema = pa.schema([(c, pa.type_for_alias(self._TYPES[t])) for c, t in columns])
+        self._writer = pq.ParquetWriter(str(path), self._schema)
+
+    def write(self, rows: List[Dict[str, Any]]) -> None:
+        # One row group per fetched batch keeps memory bounded by batch_size
+        data = {}
+        for c, t in self._columns:
+            coerce = self._COERCE[t]
+            data[c] = [None if r.get(c) is None else coerce(r[c]) for r in rows]
+        self._writer.write_table(pa.Table.from_pydict(data, schema=self._schema))
+
+    def close(self) -> None:
+        self._writer.close()
+
+
+_SINKS = {"csv": _CsvSink, "parquet": _ParquetSink}
+
+
+def export_table(
+    table: str,
+    out_dir: str,
+    fmt: str = "csv",
+    incremental: bool = False,
+    batch_size: int = EXPORT_BATCH_SIZE,
+    rows_per_file: int = EXPORT_ROWS_PER_FILE,
+) -> List[Path]:
+    """Stream table into out_dir as <table>_<first_id>-<last_id>.<fmt> part files.
+
+    With incremental=True only rows past the stored watermark are exported and
+    the watermark advances once all files are written.
+    """
+    if fmt not in _SINKS:
+        raise ValueError(f"Unknown export format: {fmt}. Choose from: {', '.join(_SINKS)}")
+    watermark_name = f"export:{table}"
+    since_id = get_watermark(watermark_name) if incremental else 0
+    columns, batches = stream_table(table, since_id, batch_size)
+
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    written: List[Path] = []
+    sink = None
+    part_path: Optional[Path] = None
+    first_id = last_id = 0
+    last_created_at: Optional[str] = None
+    in_file = 0
+
+    def finish_part() -> None:
+        nonlocal sink
+        if sink is None or part_path is None:
+            return
+        sink.close()
+        sink = None
+        final = part_path.with_name(f"{table}_{first_id}-{last_id}.{fmt}")
+        part_path.replace(final)
+        written.append(final)
+
+    try:
+        for rows in batches:
+            while rows:
+                if sink is None:
+                    first_id, in_file = int(rows[0]["id"]), 0
+                    part_path = out / f".{table}_{first_id}.{fmt}.part"
+                    sink = _SINKS[fmt](part_path, columns)
+                take = rows[:rows_per_file - in_file]
+                sink.write(take)
+                in_file += len(take)
+                last_id = int(take[-1]["id"])
+                last_created_at = take[-1].get("created_at")
+                rows = rows[len(take):]
+                if in_file >= rows_per_file:
+                    finish_part()
+        finish_part()
+    except BaseException:
+        if sink is not None:
+            sink.close()
+        if part_path is not None and part_path.exists():
+            part_path.unlink()
+        raise
+
+    if incremental and last_id:
+        set_watermark(watermark_name, last_id, last_created_at)
+    return written
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Stream claims analytics tables to CSV/Parquet")
+    parser.add_argument("--table", action="append", choices=sorted(EXPORTS), help="Repeatable; defaults to all tables")
+    parser.add_argument("--out-dir", required=True)
+    parser.add_argument("--format", choices=sorted(_SINKS), default="csv")
+    parser.add_argument("--incremental", action="store_true", help="Only export rows added since the last incremental run")
+    parser.add_argument("--batch-size", type=int, default=EXPORT_BATCH_SIZE)
+    parser.add_argument("--rows-per-file", type=int, default=EXPORT_ROWS_PER_FILE)
+    args = parser.parse_args()
+
+    for name in args.table or sorted(EXPORTS):
+        for path in export_table(name, args.out_dir, args.format, args.incremental, args.batch_size, args.rows_per_file):
+            print(path)
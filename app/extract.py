@@ -28,7 +28,8 @@ try:
 except Exception:
     Image = None  # type: ignore[assignment]
 
-from .db import insert_extracted_field, log_audit
+from .db import insert_extracted_field, insert_extracted_fields_async, log_audit, log_audit_async
+from .profiling import span
 
 
 _tess_cmd = os.getenv("TESSERACT_CMD")
@@ -39,10 +40,12 @@ if _tess_cmd and pytesseract is not None:
 def extract_text_from_pdf(path: Path) -> str:
     # Preferred path: OCR via pdf2image + Tesseract for scanned PDFs
     if convert_from_path is not None and pytesseract is not None:
-        images = convert_from_path(str(path))
+        with span("pdf.render", file=path.name):
+            images = convert_from_path(str(path))
         text_parts: List[str] = []
-        for img in images:
-            text_parts.append(pytesseract.image_to_string(img))
+        for page, img in enumerate(images, start=1):
+            with span("ocr.tesseract", file=path.name, page=page):
+                text_parts.append(pytesseract.image_to_string(img))
         return "\n".join(text_parts)
 
     # Fallback: direct text extraction from embedded PDF text
@@ -70,7 +73,8 @@ def extract_text_from_image(path: Path) -> str:
     if pytesseract is None:
         raise RuntimeError("pytesseract not installed. Install with: pip install pytesseract and Tesseract OCR")
     img = Image.open(path)
-    return pytesseract.image_to_string(img)
+    with span("ocr.tesseract", file=path.name):
+        return pytesseract.image_to_string(img)
 
 
 def extract_text_from_docx(path: Path) -> str:
@@ -103,7 +107,7 @@ CLAIM_NUMBER_RE = re.compile(r"(?:claim|claim number)[:\s]*([A-Z0-9-]{6,})", re.
 ICD10_RE = re.compile(r"\b([A-TV-Z][0-9][0-9A-Z](?:\.[0-9A-Z]{1,4})?)\b")
 
 
-def extract_structured_fields(claim_id: int, document_id: int, text: str) -> None:
+def find_structured_fields(text: str) -> List[Tuple[str, str, Optional[float]]]:
     candidates: List[Tuple[str, str, Optional[float]]] = []
     if m := POLICY_NUMBER_RE.search(text):
         candidates.append(("policy_number", m.group(1), 0.9))
@@ -111,6 +115,11 @@ def extract_structured_fields(claim_id: int, document_id: int, text: str) -> Non
         candidates.append(("claim_number", m.group(1), 0.9))
     for code in set(ICD10_RE.findall(text)):
         candidates.append(("icd10_code", code, 0.8))
+    return candidates
+
+
+def extract_structured_fields(claim_id: int, document_id: int, text: str) -> None:
+    candidates = find_structured_fields(text)
 
     for field_name, field_value, confidence in candidates:
         insert_extracted_field(
@@ -124,3 +133,9 @@ def extract_structured_fields(claim_id: int, document_id: int, text: str) -> Non
     log_audit("fields_extracted", f"extracted {len(candidates)} fields", claim_id=claim_id, document_id=document_id)
 
 
+async def extract_structured_fields_async(claim_id: int, document_id: int, text: str) -> None:
+    candidates = find_structured_fields(text)
+    await insert_extracted_fields_async(claim_id, document_id, candidates)
+    await log_audit_async("fields_extracted", f"extracted {len(candidates)} fields", claim_id=claim_id, document_id=document_id)
+
+
@@ -1,6 +1,6 @@
 from typing import Dict, List, Tuple
 
-from .db import insert_fraud_score, log_audit
+from .db import insert_fraud_score, insert_fraud_score_async, log_audit, log_audit_async
 
 
 def score_claim(extracted: Dict[str, List[str]]) -> Tuple[int, str, Dict[str, int]]:
@@ -38,6 +38,10 @@ def score_claim(extracted: Dict[str, List[str]]) -> Tuple[int, str, Dict[str, in
     if not extracted.get("claim_number"):
         hit("missing_claim_number", 20)
 
+    # Documents that could not be read (timeouts, crashes, quarantined files)
+    if extracted.get("failed_document"):
+        hit("document_extraction_failed", 10)
+
     # Normalize to risk level
     risk = "LOW"
     if score >= 50:
@@ -53,3 +57,8 @@ def persist_score(claim_id: int, score: int, risk: str, rule_hits: Dict[str, int
     log_audit("fraud_scored", f"score={score} risk={risk}", claim_id=claim_id)
 
 
+async def persist_score_async(claim_id: int, score: int, risk: str, rule_hits: Dict[str, int]):
+    await insert_fraud_score_async(claim_id, score, risk, rule_hits)
+    await log_audit_async("fraud_scored", f"score={score} risk={risk}", claim_id=claim_id)
+
+
@@ -2,7 +2,7 @@ import os
 from pathlib import Path
 from typing import Iterable, List, Tuple
 
-from .db import insert_document, log_audit
+from .db import insert_document, insert_document_async, log_audit, log_audit_async
 
 
 SUPPORTED_EXTS = {".pdf", ".png", ".jpg", ".jpeg", ".tif", ".tiff", ".docx", ".txt"}
@@ -17,13 +17,21 @@ def discover_documents(folder: str) -> List[Path]:
     return files
 
 
+def register_document(claim_id: int, f: Path) -> int:
+    file_type = f.suffix.lower().lstrip(".")
+    doc_id = insert_document(claim_id, f.name, file_type, None)
+    log_audit("document_registered", f"Registered {f.name}", claim_id=claim_id, document_id=doc_id)
+    return doc_id
+
+
+async def register_document_async(claim_id: int, f: Path) -> int:
+    file_type = f.suffix.lower().lstrip(".")
+    doc_id = await insert_document_async(claim_id, f.name, file_type, None)
+    await log_audit_async("document_registered", f"Registered {f.name}", claim_id=claim_id, document_id=doc_id)
+    return doc_id
+
+
 def register_documents(claim_id: int, files: Iterable[Path]) -> List[int]:
-    document_ids: List[int] = []
-    for f in files:
-        file_type = f.suffix.lower().lstrip(".")
-        doc_id = insert_document(claim_id, f.name, file_type, None)
-        document_ids.append(doc_id)
-        log_audit("document_registered", f"Registered {f.name}", claim_id=claim_id, document_id=doc_id)
-    return document_ids
+    return [register_document(claim_id, f) for f in files]
 
 
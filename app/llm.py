@@ -1,4 +1,5 @@
 import os
+import asyncio
 from typing import Dict, Any
 import re
 import json
@@ -8,6 +9,11 @@ try:
 except Exception as exc:
     requests = None  # type: ignore[assignment]
 
+try:
+    import httpx  # type: ignore[import-not-found]
+except Exception:
+    httpx = None  # type: ignore[assignment]
+
 
 OLLAMA_HOST = os.getenv("OLLAMA_HOST", "http://localhost:11434")
 OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "llama3.1:8b")
@@ -41,6 +47,9 @@ def _fallback_summary_from_prompt(prompt: str) -> str:
             issues.append("missing claim number")
         if len(set(codes)) > 5:
             issues.append("many ICD-10 codes")
+        failed = extracted.get("failed_document") or []
+        if failed:
+            issues.append(f"unreadable documents: {', '.join(sorted(set(failed)))}")
         issues_str = "\n- ".join([""] + issues) if issues else "none"
         return (
             f"Claim #: {claim_number}\n"
@@ -75,15 +84,7 @@ def _post_generate(prompt: str) -> str:
     except FileNotFoundError:
         # Fall back to chat API
         try:
-            chat_payload = {
-                "model": OLLAMA_MODEL,
-                "stream": False,
-                "messages": [
-                    {"role": "system", "content": "You are a precise assistant summarizing insurance claims."},
-                    {"role": "user", "content": prompt},
-                ],
-            }
-            resp = requests.post(f"{OLLAMA_HOST}/api/chat", json=chat_payload, timeout=120)
+            resp = requests.post(f"{OLLAMA_HOST}/api/chat", json=_chat_payload(prompt), timeout=120)
             if 200 <= resp.status_code < 300:
                 data = resp.json()
                 msg = data.get("message") or {}
@@ -96,6 +97,48 @@ def _post_generate(prompt: str) -> str:
         return _fallback_summary_from_prompt(prompt)
 
 
+def _chat_payload(prompt: str) -> Dict[str, Any]:
+    return {
+        "model": OLLAMA_MODEL,
+        "stream": False,
+        "messages": [
+            {"role": "system", "content": "You are a precise assistant summarizing insurance claims."},
+            {"role": "user", "content": prompt},
+        ],
+    }
+
+
+async def _post_generate_async(prompt: str) -> str:
+    """Async twin of _post_generate using httpx; same generate -> chat -> local fallback order."""
+    if httpx is None:
+        # No async client installed: run the blocking client off the event loop
+        return await asyncio.to_thread(_post_generate, prompt)
+    async with httpx.AsyncClient(timeout=120) as client:
+        try:
+            resp = await client.post(
+                f"{OLLAMA_HOST}/api/generate",
+                json={"model": OLLAMA_MODEL, "prompt": prompt, "stream": False},
+            )
+            if resp.status_code == 404:
+                raise FileNotFoundError("generate endpoint not found")
+            if 200 <= resp.status_code < 300:
+                data = resp.json()
+                return data.get("response", "") or ""
+            raise RuntimeError(f"generate HTTP {resp.status_code}")
+        except FileNotFoundError:
+            try:
+                resp = await client.post(f"{OLLAMA_HOST}/api/chat", json=_chat_payload(prompt))
+                if 200 <= resp.status_code < 300:
+                    data = resp.json()
+                    msg = data.get("message") or {}
+                    return (msg.get("content") or data.get("response") or "").strip()
+                return _fallback_summary_from_prompt(prompt)
+            except Exception:
+                return _fallback_summary_from_prompt(prompt)
+        except Exception:
+            return _fallback_summary_from_prompt(prompt)
+
+
 def generate_summary(prompt: str) -> str:
     if os.getenv("DISABLE_LLM", "0") == "1":
         return "LLM disabled by configuration (DISABLE_LLM=1)."
@@ -103,3 +146,7 @@ def generate_summary(prompt: str) -> str:
     return _post_generate(prompt)
 
 
+async def generate_summary_async(prompt: str) -> str:
+    if os.getenv("DISABLE_LLM", "0") == "1":
+        return "LLM disabled by configuration (DISABLE_LLM=1)."
+    return await _post_generate_async(prompt)
@@ -0,0 +1,247 @@
+import asyncio
+import contextlib
+import contextvars
+import itertools
+import json
+import os
+import re
+import sys
+import threading
+import time
+import weakref
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+
+# Opt-in per claim: run_pipeline(profile=True), --profile on the CLI,
+# {"profile": true} on POST /process, or PROFILE_CLAIMS=1 for every claim.
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(os.path.dirname(__file__), "..", "profiles"))
+PROFILE_SAMPLE_INTERVAL_MS = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "5"))
+_MAX_STACK_DEPTH = 64
+_MAX_ARG_CHARS = 200
+
+# Chrome trace "processes" used to keep spans and CPU samples on separate tracks
+_SPANS_PID = 1
+_SAMPLES_PID = 2
+
+_current: "contextvars.ContextVar[Optional[Profiler]]" = contextvars.ContextVar("claim_profiler", default=None)
+_NULL_SPAN = contextlib.nullcontext()
+
+
+def _now_us() -> int:
+    # Wall clock so spans from supervised OCR workers line up with the parent
+    return time.time_ns() // 1000
+
+
+class Profiler:
+    """Collects Chrome trace events for a single claim.
+
+    Spans are recorded from any thread or task that inherits the profiler's
+    context. Spans opened in an asyncio task go on a track of their own, since
+    tasks interleave on the event-loop thread. A background thread samples the
+    Python stacks of the threads currently inside a span; the event-loop thread
+    is never sampled, because it also runs other claims.
+    """
+
+    def __init__(self, name: str, sample: bool = True):
+        self.name = name
+        self.events: List[Dict[str, Any]] = []
+        self.path: Optional[Path] = None
+        self._threads: Dict[int, int] = {}
+        self._threads_lock = threading.Lock()
+        self._task_tracks: "weakref.WeakKeyDictionary[asyncio.Task, int]" = weakref.WeakKeyDictionary()
+        self._track_names: Dict[int, str] = {}
+        self._next_track = itertools.count(1)
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+        if sample:
+            self._sampler = threading.Thread(target=self._sample_loop, name="claim-profiler", daemon=True)
+
+    def start(self, sample_caller: bool = True) -> None:
+        if sample_caller:
+            self.enter_thread()
+        if self._sampler is not None:
+            self._sampler.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._sampler is not None and self._sampler.is_alive():
+            self._sampler.join()
+
+    def enter_thread(self) -> None:
+        tid = threading.get_ident()
+        with self._threads_lock:
+            self._threads[tid] = self._threads.get(tid, 0) + 1
+
+    def exit_thread(self) -> None:
+        tid = threading.get_ident()
+        with self._threads_lock:
+            n = self._threads.get(tid, 0) - 1
+            if n > 0:
+                self._threads[tid] = n
+            else:
+                self._threads.pop(tid, None)
+
+    def task_track(self) -> Optional[int]:
+        """Track id for the running asyncio task, or None outside a task."""
+        try:
+            task = asyncio.current_task()
+        except RuntimeError:
+            return None
+        if task is None:
+            return None
+        with self._threads_lock:
+            track = self._task_tracks.get(task)
+            if track is None:
+                track = self._task_tracks[task] = next(self._next_track)
+                self._track_names[track] = f"task {task.get_name()}"
+        return track
+
+    def add_span(self, name: str, start_us: int, end_us: int, args: Dict[str, Any], track: Optional[int] = None) -> None:
+        args = {k: v[:_MAX_ARG_CHARS] if isinstance(v, str) else v for k, v in args.items()}
+        self.events.append({
+            "name": name, "cat": name.split(".", 1)[0], "ph": "X", "ts": start_us, "dur": max(0, end_us - start_us),
+            "pid": _SPANS_PID, "tid": threading.get_ident() if track is None else track, "args": args,
+        })
+
+    def _sample_loop(self) -> None:
+        interval = PROFILE_SAMPLE_INTERVAL_MS / 1000.0
+        open_frames: Dict[int, List[Tuple[str, int]]] = {}
+        while not self._stop.wait(interval):
+            now = _now_us()
+            frames = sys._current_frames()
+            with self._threads_lock:
+                tids = list(self._threads)
+            for tid in tids:
+                frame = frames.get(tid)
+                stack: List[str] = []
+                while frame is not None and len(stack) < _MAX_STACK_DEPTH:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.reverse()
+                self._diff_stack(tid, open_frames.setdefault(tid, []), stack, now)
+            for tid in list(open_frames):
+                if tid not in tids:
+                    self._diff_stack(tid, open_frames.pop(tid), [], now)
+        now = _now_us()
+        for tid, opened in open_frames.items():
+            self._diff_stack(tid, opened, [], now)
+
+    def _diff_stack(self, tid: int, opened: List[Tuple[str, int]], stack: List[str], now: int) -> None:
+        # Consecutive samples sharing a frame prefix extend one slice per frame
+        common = 0
+        while common < len(opened) and common < len(stack) and opened[common][0] == stack[common]:
+            common += 1
+        for name, start in reversed(opened[common:]):
+            self.events.append({
+                "name": name, "cat": "sample", "ph": "X", "ts": start, "dur": max(0, now - start),
+                "pid": _SAMPLES_PID, "tid": tid,
+            })
+        del opened[common:]
+        opened.extend((name, now) for name in stack[common:])
+
+    def write(self, directory: Optional[str] = None) -> Path:
+        out = Path(directory or PROFILE_DIR)
+        out.mkdir(parents=True, exist_ok=True)
+        safe = re.sub(r"[^A-Za-z0-9_.-]", "_", self.name)
+        self.path = out / f"{safe}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.trace.json"
+        meta = [
+            {"name": "process_name", "ph": "M", "pid": _SPANS_PID, "args": {"name": "pipeline spans"}},
+            {"name": "process_name", "ph": "M", "pid": _SAMPLES_PID, "args": {"name": "cpu samples"}},
+        ]
+        meta += [
+            {"name": "thread_name", "ph": "M", "pid": _SPANS_PID, "tid": track, "args": {"name": label}}
+            for track, label in self._track_names.items()
+        ]
+        with self.path.open("w", encoding="utf-8") as fh:
+            json.dump({"traceEvents": meta + self.events, "displayTimeUnit": "ms", "otherData": {"claim": self.name}}, fh)
+        return self.path
+
+
+def current_profiler() -> Optional[Profiler]:
+    return _current.get()
+
+
+def activate(profiler: Optional[Profiler]) -> "contextvars.Token[Optional[Profiler]]":
+    """Make profiler current for this context (e.g. in a worker process); returns a reset token."""
+    return _current.set(profiler)
+
+
+@contextlib.contextmanager
+def _span(prof: Profiler, name: str, args: Dict[str, Any]) -> Iterator[None]:
+    track = prof.task_track()
+    # Only threads doing this claim's work are sampled, not the shared loop
+    if track is None:
+        prof.enter_thread()
+    start = _now_us()
+    try:
+        yield
+    finally:
+        prof.add_span(name, start, _now_us(), args, track)
+        if track is None:
+            prof.exit_thread()
+
+
+def span(name: str, **args: Any):
+    """Time a block as a trace span; a shared no-op when no claim is being profiled."""
+    prof = _current.get()
+    if prof is None:
+        return _NULL_SPAN
+    return _span(prof, name, args)
+
+
+def profiling_requested(flag: Optional[bool]) -> bool:
+    if flag is not None:
+        return flag
+    return os.getenv("PROFILE_CLAIMS", "0") == "1"
+
+
+@contextlib.contextmanager
+def profile_claim(claim_number: str, enabled: Optional[bool] = None) -> Iterator[Optional[Profiler]]:
+    """Profile everything run inside the block; yields None when profiling is off.
+
+    The trace file is written on exit and its path is available as
+    ``profiler.path``.
+    """
+    if not profiling_requested(enabled):
+        yield None
+        return
+    prof = Profiler(claim_number)
+    token = _current.set(prof)
+    prof.start()
+    try:
+        with span("pipeline", claim_number=claim_number):
+            yield prof
+    finally:
+        prof.stop()
+        _current.reset(token)
+        prof.write()
+
+
+@contextlib.asynccontextmanager
+async def profile_claim_async(claim_number: str, enabled: Optional[bool] = None) -> AsyncIterator[Optional[Profiler]]:
+    """profile_claim for coroutines: the event-loop thread is not sampled and
+    joining the sampler and writing the trace happen off the loop."""
+    if not profiling_requested(enabled):
+        yield None
+        return
+    prof = Profiler(claim_number)
+    token = _current.set(prof)
+    prof.start(sample_caller=False)
+    try:
+        with span("pipeline", claim_number=claim_number):
+            yield prof
+    finally:
+        _current.reset(token)
+        await asyncio.to_thread(prof.stop)
+        await asyncio.to_thread(prof.write)
+
+
+def load_worker_events(path: str) -> List[Dict[str, Any]]:
+    """Read span events written by a supervised OCR worker (see app.supervise)."""
+    try:
+        with open(path, encoding="utf-8") as fh:
+            return json.load(fh)
+    except Exception:
+        return []
@@ -0,0 +1,147 @@
+import json
+import os
+import re
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+
+
+# Token budget for the whole prompt (template + structured data + snippets).
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "1500"))
+# Maximum characters per snippet window cut from a document.
+SNIPPET_WINDOW_CHARS = int(os.getenv("SNIPPET_WINDOW_CHARS", "400"))
+
+_WORD_RE = re.compile(r"[A-Za-z0-9][A-Za-z0-9.\-]{3,}")
+_STOPWORDS = {
+    "with", "from", "that", "this", "were", "was", "have", "has", "been", "into", "onto",
+    "after", "before", "during", "while", "there", "their", "then", "than", "about", "minor",
+}
+
+
+def estimate_tokens(text: str) -> int:
+    # ~4 characters per token for Llama-family tokenizers on English text;
+    # good enough for budgeting without shipping a tokenizer.
+    return (len(text) + 3) // 4
+
+
+def dedupe_fields(structured: Dict[str, List[str]]) -> Dict[str, List[str]]:
+    deduped: Dict[str, List[str]] = {}
+    for name, values in structured.items():
+        seen = set()
+        unique: List[str] = []
+        for v in values:
+            key = str(v).strip()
+            if key and key.upper() not in seen:
+                seen.add(key.upper())
+                unique.append(key)
+        deduped[name] = unique
+    return deduped
+
+
+def incident_keywords(incident_description: str | None) -> List[str]:
+    if not incident_description:
+        return []
+    words = {w.lower() for w in _WORD_RE.findall(incident_description)}
+    return sorted(w for w in words if w not in _STOPWORDS)
+
+
+def split_windows(text: str, window_chars: int = SNIPPET_WINDOW_CHARS) -> List[str]:
+    """Group consecutive non-blank lines into windows of at most window_chars."""
+    windows: List[str] = []
+    current: List[str] = []
+    size = 0
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        while len(line) > window_chars:
+            if current:
+                windows.append("\n".join(current))
+                current, size = [], 0
+            windows.append(line[:window_chars])
+            line = line[window_chars:]
+        if current and size + len(line) + 1 > window_chars:
+            windows.append("\n".join(current))
+            current, size = [], 0
+        current.append(line)
+        size += len(line) + 1
+    if current:
+        windows.append("\n".join(current))
+    return windows
+
+
+def rank_windows(documents: Sequence[str], field_values: Sequence[str], keywords: Sequence[str]) -> List[Tuple[int, int, int, str]]:
+    """Return (score, doc_index, window_index, text) sorted best-first.
+
+    A window scores 3 per distinct extracted value it contains and 1 per
+    distinct incident keyword. Windows that match nothing are dropped unless
+    no window matches at all, in which case document order is kept.
+    """
+    values = [v.lower() for v in field_values if v]
+    ranked: List[Tuple[int, int, int, str]] = []
+    for d, text in enumerate(documents):
+        for w, window in enumerate(split_windows(text)):
+            low = window.lower()
+            score = 3 * sum(1 for v in values if v in low) + sum(1 for k in keywords if k in low)
+            ranked.append((score, d, w, window))
+    if any(r[0] > 0 for r in ranked):
+        ranked = [r for r in ranked if r[0] > 0]
+    ranked.sort(key=lambda r: (-r[0], r[1], r[2]))
+    return ranked
+
+
+def pack_snippets(ranked: Sequence[Tuple[int, int, int, str]], budget_tokens: int) -> List[str]:
+    separator_tokens = estimate_tokens("\n---\n")
+    chosen: List[Tuple[int, int, str]] = []
+    used = 0
+    for _, d, w, window in ranked:
+        cost = estimate_tokens(window) + (separator_tokens if chosen else 0)
+        if used + cost > budget_tokens:
+            continue
+        chosen.append((d, w, window))
+        used += cost
+    chosen.sort()
+    return [window for _, _, window in chosen]
+
+
+def build_prompt(
+    claim_number: str,
+    policy_holder: str,
+    claim_type: str,
+    incident_description: str | None,
+    structured: Dict[str, List[str]],
+    score: int,
+    risk: str,
+    rule_hits: Dict[str, int],
+    documents: Sequence[str],
+    token_budget: int | None = None,
+) -> Tuple[str, Dict[str, int]]:
+    """Render prompt_template.txt within token_budget; returns (prompt, stats)."""
+    budget = PROMPT_TOKEN_BUDGET if token_budget is None else token_budget
+    tmpl = Path(__file__).with_name("prompt_template.txt").read_text(encoding="utf-8")
+    extracted = dedupe_fields(structured)
+    structured_json = json.dumps({
+        "claim_number": claim_number,
+        "policy_holder": policy_holder,
+        "claim_type": claim_type,
+        "incident_description": incident_description,
+        "extracted": extracted,
+        "fraud": {"score": score, "risk": risk, "rules": rule_hits},
+    }, ensure_ascii=False, separators=(",", ":"))
+
+    fixed_tokens = estimate_tokens(tmpl.format(structured_json=structured_json, snippets=""))
+    field_values = [v for name, values in extracted.items() if name != "policy_holder" for v in values]
+    ranked = rank_windows(documents, field_values, incident_keywords(incident_description))
+    snippets = pack_snippets(ranked, max(0, budget - fixed_tokens))
+
+    prompt = tmpl.format(structured_json=structured_json, snippets="\n---\n".join(snippets))
+    stats = {
+        "prompt_tokens": estimate_tokens(prompt),
+        "budget": budget,
+        "snippets_used": len(snippets),
+        "snippets_ranked": len(ranked),
+    }
+    return prompt, stats
+
+
+def format_prompt_stats(stats: Dict[str, int]) -> str:
+    return " ".join(f"{k}={v}" for k, v in stats.items())
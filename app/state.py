@@ -0,0 +1,105 @@
+import json
+from typing import Any, Dict, List, Optional
+
+from .db import fetchall, fetchone, rebuild_claim_state
+
+
+MAX_PAGE_SIZE = 500
+
+_STATE_COLUMNS = (
+    "s.claim_id, s.claim_number, s.policy_holder, s.claim_type, s.score, s.risk_level, "
+    "s.rule_hits, s.summary_audit_id, s.document_count, s.updated_at"
+)
+
+
+def _decode(row: Dict[str, Any]) -> Dict[str, Any]:
+    hits = row.get("rule_hits")
+    if isinstance(hits, (str, bytes)):
+        try:
+            row["rule_hits"] = json.loads(hits)
+        except Exception:
+            row["rule_hits"] = {"raw": str(hits)}
+    if row.get("updated_at") is not None:
+        row["updated_at"] = str(row["updated_at"])
+    return row
+
+
+def _attach_fields(rows: List[Dict[str, Any]]) -> None:
+    if not rows:
+        return
+    ids = [r["claim_id"] for r in rows]
+    placeholders = ",".join(["%s"] * len(ids))
+    fields = fetchall(
+        f"SELECT claim_id, field_name, field_value FROM claim_state_fields WHERE claim_id IN ({placeholders})",
+        tuple(ids),
+    )
+    by_claim: Dict[int, Dict[str, List[str]]] = {i: {} for i in ids}
+    for f in fields:
+        by_claim[f["claim_id"]].setdefault(f["field_name"], []).append(f["field_value"])
+    for r in rows:
+        r["fields"] = by_claim[r["claim_id"]]
+
+
+def list_claim_states(
+    limit: int = 50,
+    after_id: int = 0,
+    risk_level: Optional[str] = None,
+    claim_type: Optional[str] = None,
+    min_score: Optional[int] = None,
+    include_fields: bool = False,
+) -> Dict[str, Any]:
+    """Keyset-paginated page of claim_state rows ordered by claim_id.
+
+    Pass the returned next_after_id back as after_id for the next page; it is
+    None on the last page. Costs one query (two with include_fields).
+    """
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+    where = ["s.claim_id > %s"]
+    params: List[Any] = [after_id]
+    if risk_level:
+        where.append("s.risk_level = %s")
+        params.append(risk_level.upper())
+    if claim_type:
+        where.append("s.claim_type = %s")
+        params.append(claim_type)
+    if min_score is not None:
+        where.append("s.score >= %s")
+        params.append(min_score)
+    params.append(limit + 1)
+    rows = fetchall(
+        f"SELECT {_STATE_COLUMNS} FROM claim_state s WHERE {' AND '.join(where)} ORDER BY s.claim_id LIMIT %s",
+        tuple(params),
+    )
+    has_more = len(rows) > limit
+    rows = [_decode(r) for r in rows[:limit]]
+    if include_fields:
+        _attach_fields(rows)
+    return {"items": rows, "next_after_id": rows[-1]["claim_id"] if has_more else None}
+
+
+def get_claim_state(claim_number: str) -> Optional[Dict[str, Any]]:
+    row = fetchone(f"SELECT {_STATE_COLUMNS} FROM claim_state s WHERE s.claim_number=%s", (claim_number,))
+    if not row:
+        return None
+    row = _decode(row)
+    _attach_fields([row])
+    return row
+
+
+def get_claim_summary(claim_number: str) -> Optional[str]:
+    row = fetchone(
+        "SELECT a.details FROM claim_state s JOIN audit_logs a ON a.id = s.summary_audit_id WHERE s.claim_number=%s",
+        (claim_number,),
+    )
+    return row["details"] if row else None
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Maintain the claim_state table")
+    parser.add_argument("--rebuild", action="store_true", help="Recompute claim_state from the base tables")
+    args = parser.parse_args()
+    if args.rebuild:
+        rebuild_claim_state()
+        print("claim_state rebuilt")
@@ -0,0 +1,201 @@
+import asyncio
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .db import (
+    SUMMARY_ACTION,
+    execute,
+    execute_async,
+    fetchall,
+    fetchall_async,
+    get_claim_id_by_number,
+    get_claim_id_by_number_async,
+    insert_claim,
+    insert_claim_async,
+    insert_extracted_field,
+    insert_extracted_fields_async,
+    log_audit,
+    log_audit_async,
+    update_claim,
+    update_claim_async,
+)
+from .extract import extract_structured_fields, extract_structured_fields_async
+from .fraud import persist_score, persist_score_async, score_claim
+from .ingest import register_document, register_document_async
+from .llm import generate_summary, generate_summary_async
+from .profiling import Profiler, span
+from .prompt import build_prompt, format_prompt_stats
+from .supervise import extract_document, extract_document_async
+
+
+# Pipeline steps shared by app.cli.run_pipeline and app.async_pipeline.run_pipeline_async.
+# Each step has a sync and an *_async twin; the logic they share lives in the
+# plain helpers so the two pipelines cannot drift apart.
+
+Scored = Tuple[int, str, Dict[str, int]]
+
+# Deduplicated values maintained in claim_state_fields (see app/db.py)
+STRUCTURED_FIELDS_SQL = "SELECT field_name, field_value FROM claim_state_fields WHERE claim_id=%s"
+COLLECT_DOCUMENTS_SQL = "SELECT content_text FROM documents WHERE claim_id=%s AND content_text IS NOT NULL ORDER BY id"
+_SET_DOCUMENT_TEXT_SQL = "UPDATE documents SET content_text=%s WHERE id=%s"
+SUMMARY_AUDIT_CHARS = 500
+
+
+def group_fields(rows) -> Dict[str, List[str]]:
+    structured: Dict[str, List[str]] = {}
+    for r in rows:
+        structured.setdefault(r["field_name"], []).append(r["field_value"])
+    return structured
+
+
+def backfill_identifiers(structured: Dict[str, List[str]], claim_number: str, policy_holder: str, policy_number: Optional[str]) -> List[Tuple[str, str, float]]:
+    """Ensure core identifiers are present for scoring/LLM even if extractors miss them.
+
+    Returns the claim-level fields the caller must persist (document_id None).
+    """
+    if not structured.get("claim_number"):
+        structured["claim_number"] = [claim_number]
+    if policy_holder and not structured.get("policy_holder"):
+        structured["policy_holder"] = [policy_holder]
+    if not policy_number:
+        return []
+    structured.setdefault("policy_number", []).append(policy_number)
+    return [("policy_number", policy_number, 1.0)]
+
+
+def document_texts(rows) -> List[str]:
+    # Full texts; app.prompt ranks and trims them to the token budget
+    return [r["content_text"] for r in rows if r.get("content_text")]
+
+
+def _claim_prompt(claim: Dict[str, Any], structured: Dict[str, List[str]], scored: Scored, documents: List[str]) -> Tuple[str, Dict[str, Any]]:
+    score, risk, rule_hits = scored
+    return build_prompt(
+        claim["claim_number"], claim["policy_holder"], claim["claim_type"], claim["incident_description"],
+        structured, score, risk, rule_hits, documents,
+    )
+
+
+# Sync steps
+
+def record_profile(prof: Optional[Profiler], claim_id: Optional[int], claim_number: str) -> None:
+    # Runs in a finally: a failed claim's trace is the one most worth finding
+    if prof is None or prof.path is None:
+        return
+    if claim_id is None:
+        claim_id = get_claim_id_by_number(claim_number)
+    log_audit("profile_captured", str(prof.path), claim_id=claim_id)
+
+
+def upsert_claim(claim: Dict[str, Any]) -> int:
+    with span("claim.upsert"):
+        claim_id = get_claim_id_by_number(claim["claim_number"])
+        if claim_id:
+            update_claim(claim_id, claim["policy_holder"], claim["claim_type"], claim["incident_description"])
+            return claim_id
+        return insert_claim(claim["claim_number"], claim["policy_holder"], claim["claim_type"], claim["incident_description"])
+
+
+def process_document(claim_id: int, path: Path) -> None:
+    with span("document", file=path.name):
+        doc_id = register_document(claim_id, path)
+        # OCR runs in a supervised, killable worker process (see app.supervise)
+        with span("extract.text", file=path.name):
+            text = extract_document(claim_id, doc_id, path)
+        if text is None:
+            # Dead-lettered; recorded as a failed_document field for scoring
+            return
+        if text.strip():
+            execute(_SET_DOCUMENT_TEXT_SQL, (text, doc_id))
+        with span("extract.fields", file=path.name):
+            extract_structured_fields(claim_id, doc_id, text)
+
+
+def score_claim_fields(claim_id: int, claim: Dict[str, Any]) -> Tuple[Dict[str, List[str]], Scored]:
+    with span("fraud.score"):
+        structured = group_fields(fetchall(STRUCTURED_FIELDS_SQL, (claim_id,)))
+        for name, value, confidence in backfill_identifiers(structured, claim["claim_number"], claim["policy_holder"], claim["policy_number"]):
+            insert_extracted_field(claim_id, name, value, confidence, document_id=None)
+        scored = score_claim(structured)
+        persist_score(claim_id, *scored)
+    return structured, scored
+
+
+def summarize_claim(claim_id: int, claim: Dict[str, Any], structured: Dict[str, List[str]], scored: Scored) -> str:
+    with span("prompt.build"):
+        prompt, prompt_stats = _claim_prompt(claim, structured, scored, document_texts(fetchall(COLLECT_DOCUMENTS_SQL, (claim_id,))))
+        log_audit("prompt_built", format_prompt_stats(prompt_stats), claim_id=claim_id)
+    with span("llm.generate", **prompt_stats):
+        summary = generate_summary(prompt)
+    log_audit(SUMMARY_ACTION, summary[:SUMMARY_AUDIT_CHARS], claim_id=claim_id)
+    return summary
+
+
+# Async steps
+
+async def record_profile_async(prof: Optional[Profiler], claim_id: Optional[int], claim_number: str) -> None:
+    if prof is None or prof.path is None:
+        return
+    if claim_id is None:
+        claim_id = await get_claim_id_by_number_async(claim_number)
+    await log_audit_async("profile_captured", str(prof.path), claim_id=claim_id)
+
+
+async def upsert_claim_async(claim: Dict[str, Any]) -> int:
+    with span("claim.upsert"):
+        claim_id = await get_claim_id_by_number_async(claim["claim_number"])
+        if claim_id:
+            await update_claim_async(claim_id, claim["policy_holder"], claim["claim_type"], claim["incident_description"])
+            return claim_id
+        return await insert_claim_async(claim["claim_number"], claim["policy_holder"], claim["claim_type"], claim["incident_description"])
+
+
+async def process_document_async(claim_id: int, path: Path) -> None:
+    with span("document", file=path.name):
+        doc_id = await register_document_async(claim_id, path)
+        with span("extract.text", file=path.name):
+            text = await extract_document_async(claim_id, doc_id, path)
+        if text is None:
+            return
+        if text.strip():
+            await execute_async(_SET_DOCUMENT_TEXT_SQL, (text, doc_id))
+        with span("extract.fields", file=path.name):
+            await extract_structured_fields_async(claim_id, doc_id, text)
+
+
+async def score_claim_fields_async(claim_id: int, claim: Dict[str, Any]) -> Tuple[Dict[str, List[str]], Scored]:
+    with span("fraud.score"):
+        structured = group_fields(await fetchall_async(STRUCTURED_FIELDS_SQL, (claim_id,)))
+        fields = backfill_identifiers(structured, claim["claim_number"], claim["policy_holder"], claim["policy_number"])
+        if fields:
+            await insert_extracted_fields_async(claim_id, None, fields)
+        scored = score_claim(structured)
+        await persist_score_async(claim_id, *scored)
+    return structured, scored
+
+
+async def summarize_claim_async(claim_id: int, claim: Dict[str, Any], structured: Dict[str, List[str]], scored: Scored) -> str:
+    with span("prompt.build"):
+        documents = document_texts(await fetchall_async(COLLECT_DOCUMENTS_SQL, (claim_id,)))
+        prompt, prompt_stats = _claim_prompt(claim, structured, scored, documents)
+        await log_audit_async("prompt_built", format_prompt_stats(prompt_stats), claim_id=claim_id)
+    with span("llm.generate", **prompt_stats):
+        summary = await generate_summary_async(prompt)
+    await log_audit_async(SUMMARY_ACTION, summary[:SUMMARY_AUDIT_CHARS], claim_id=claim_id)
+    return summary
+
+
+async def gather_or_cancel(*aws) -> List[Any]:
+    """Like asyncio.gather, but the first failure cancels and awaits the rest.
+
+    Keeps sibling document tasks from writing to a claim in the background
+    after the request that started them has already failed.
+    """
+    tasks = [asyncio.ensure_future(aw) for aw in aws]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
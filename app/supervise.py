@@ -0,0 +1,324 @@
+import asyncio
+import hashlib
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import weakref
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+try:
+    import resource  # POSIX only
+except Exception:
+    resource = None  # type: ignore[assignment]
+
+from .db import (
+    count_dead_letters,
+    count_dead_letters_async,
+    insert_dead_letter,
+    insert_dead_letter_async,
+    insert_extracted_field,
+    insert_extracted_fields_async,
+    log_audit,
+    release_dead_letters,
+    log_audit_async,
+)
+from .extract import extract_text
+from .profiling import Profiler, activate, current_profiler, load_worker_events, span
+
+
+# OCR-backed formats run in a separate, killable worker process; the rest are
+# cheap enough to extract in-process.
+SUPERVISED_EXTS = {".pdf", ".png", ".jpg", ".jpeg", ".tif", ".tiff"}
+
+OCR_TIMEOUT_S = float(os.getenv("OCR_TIMEOUT_S", "120"))
+OCR_MEMORY_LIMIT_MB = int(os.getenv("OCR_MEMORY_LIMIT_MB", "2048"))
+OCR_MAX_ATTEMPTS = int(os.getenv("OCR_MAX_ATTEMPTS", "3"))
+OCR_RETRY_BACKOFF_S = float(os.getenv("OCR_RETRY_BACKOFF_S", "1.0"))
+# Files that timed out, crashed or ran out of memory this many times within
+# OCR_QUARANTINE_TTL_HOURS (0 = forever) are skipped without another try.
+# Release one early with: python -m app.supervise --release <sha256>
+OCR_QUARANTINE_AFTER = int(os.getenv("OCR_QUARANTINE_AFTER", "2"))
+OCR_QUARANTINE_TTL_HOURS = float(os.getenv("OCR_QUARANTINE_TTL_HOURS", "168"))
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", str(os.cpu_count() or 2)))
+
+FAILED_DOCUMENT_FIELD = "failed_document"
+
+# dead_letters.failure_kind values. Only failures caused by the file itself
+# count toward quarantine; "error" also covers environment problems such as a
+# missing OCR dependency, which must not lock files out once fixed.
+FAILURE_TIMEOUT = "timeout"
+FAILURE_CRASH = "crash"
+FAILURE_MEMORY = "memory"
+FAILURE_ERROR = "error"
+FAILURE_QUARANTINED = "quarantined"
+_RETRYABLE = {FAILURE_TIMEOUT, FAILURE_CRASH}
+QUARANTINE_KINDS = (FAILURE_TIMEOUT, FAILURE_CRASH, FAILURE_MEMORY)
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+# Worker exit codes
+_EXIT_ERROR = 2
+_EXIT_MEMORY = 3
+
+_POSIX = os.name == "posix"
+
+
+def file_sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _worker_command(path: Path) -> List[str]:
+    return [sys.executable, "-m", "app.supervise", "--mem-mb", str(OCR_MEMORY_LIMIT_MB), str(path.resolve())]
+
+
+def _kill_tree(pid: int) -> None:
+    # The worker leads its own session, so this also reaps tesseract/pdftoppm
+    try:
+        if _POSIX:
+            os.killpg(pid, signal.SIGKILL)
+        else:
+            os.kill(pid, signal.SIGTERM)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+# (text, failure_reason, failure_kind); reason and kind are None on success
+Outcome = Tuple[Optional[str], Optional[str], Optional[str]]
+
+
+def _classify(returncode: int, out: bytes, err: bytes) -> Outcome:
+    """Map a finished worker to (text, failure_reason, failure_kind)."""
+    if returncode == 0:
+        return out.decode("utf-8", errors="replace"), None, None
+    message = err.decode("utf-8", errors="replace").strip().splitlines()
+    detail = message[-1] if message else ""
+    if returncode == _EXIT_ERROR:
+        return None, f"extraction error: {detail}", FAILURE_ERROR
+    if returncode == _EXIT_MEMORY:
+        return None, f"memory limit of {OCR_MEMORY_LIMIT_MB} MB exceeded", FAILURE_MEMORY
+    return None, f"worker crashed (exit code {returncode}) {detail}".strip(), FAILURE_CRASH
+
+
+def _trace_file() -> Optional[str]:
+    # When the claim is being profiled the worker records its own spans
+    # (pdf.render / ocr.tesseract) to a file merged into the parent trace.
+    if current_profiler() is None:
+        return None
+    fd, name = tempfile.mkstemp(prefix="ocr-trace-", suffix=".json")
+    os.close(fd)
+    return name
+
+
+def _merge_trace(trace_out: Optional[str]) -> None:
+    prof = current_profiler()
+    if trace_out is None:
+        return
+    if prof is not None:
+        prof.events.extend(load_worker_events(trace_out))
+    try:
+        os.unlink(trace_out)
+    except OSError:
+        pass
+
+
+def _run_worker(path: Path) -> Outcome:
+    trace_out = _trace_file()
+    cmd = _worker_command(path) + (["--trace-out", trace_out] if trace_out else [])
+    with span("ocr.worker", file=path.name):
+        try:
+            return _run_worker_process(cmd)
+        finally:
+            _merge_trace(trace_out)
+
+
+def _run_worker_process(cmd: List[str]) -> Outcome:
+    proc = subprocess.Popen(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        cwd=str(PROJECT_ROOT),
+        start_new_session=_POSIX,
+    )
+    try:
+        out, err = proc.communicate(timeout=OCR_TIMEOUT_S)
+    except subprocess.TimeoutExpired:
+        _kill_tree(proc.pid)
+        proc.communicate()
+        return None, f"timeout after {OCR_TIMEOUT_S:g}s", FAILURE_TIMEOUT
+    return _classify(proc.returncode, out, err)
+
+
+async def _run_worker_async(path: Path) -> Outcome:
+    trace_out = _trace_file()
+    cmd = _worker_command(path) + (["--trace-out", trace_out] if trace_out else [])
+    with span("ocr.worker", file=path.name):
+        try:
+            return await _run_worker_process_async(cmd)
+        finally:
+            _merge_trace(trace_out)
+
+
+async def _run_worker_process_async(cmd: List[str]) -> Outcome:
+    proc = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        cwd=str(PROJECT_ROOT),
+        start_new_session=_POSIX,
+    )
+    try:
+        out, err = await asyncio.wait_for(proc.communicate(), timeout=OCR_TIMEOUT_S)
+    except asyncio.TimeoutError:
+        _kill_tree(proc.pid)
+        await proc.wait()
+        return None, f"timeout after {OCR_TIMEOUT_S:g}s", FAILURE_TIMEOUT
+    except BaseException:
+        # Cancelled (shutdown, a failed sibling document): don't leave the
+        # worker and its tesseract/pdftoppm children running.
+        _kill_tree(proc.pid)
+        await asyncio.shield(proc.wait())
+        raise
+    return _classify(proc.returncode or 0, out, err)
+
+
+def _extract_inline(path: Path) -> Outcome:
+    try:
+        return extract_text(path), None, None
+    except Exception as exc:
+        return None, f"extraction error: {type(exc).__name__}: {exc}", FAILURE_ERROR
+
+
+def supervised_extract_text(path: Path) -> Tuple[Optional[str], Optional[str], Optional[str], int]:
+    """Extract text with timeout/memory limits and retries; returns (text, failure_reason, failure_kind, attempts)."""
+    if path.suffix.lower() not in SUPERVISED_EXTS:
+        return (*_extract_inline(path), 1)
+    reason: Optional[str] = None
+    kind: Optional[str] = None
+    for attempt in range(1, OCR_MAX_ATTEMPTS + 1):
+        text, reason, kind = _run_worker(path)
+        if kind not in _RETRYABLE or attempt == OCR_MAX_ATTEMPTS:
+            return text, reason, kind, attempt
+        time.sleep(OCR_RETRY_BACKOFF_S * 2 ** (attempt - 1))
+    return None, reason, kind, OCR_MAX_ATTEMPTS
+
+
+_ocr_slots: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+
+def _ocr_slot() -> asyncio.Semaphore:
+    # Bounds concurrent OCR workers per event loop
+    loop = asyncio.get_running_loop()
+    slot = _ocr_slots.get(loop)
+    if slot is None:
+        slot = _ocr_slots[loop] = asyncio.Semaphore(OCR_WORKERS)
+    return slot
+
+
+async def supervised_extract_text_async(path: Path) -> Tuple[Optional[str], Optional[str], Optional[str], int]:
+    if path.suffix.lower() not in SUPERVISED_EXTS:
+        return (*await asyncio.to_thread(_extract_inline, path), 1)
+    reason: Optional[str] = None
+    kind: Optional[str] = None
+    for attempt in range(1, OCR_MAX_ATTEMPTS + 1):
+        async with _ocr_slot():
+            text, reason, kind = await _run_worker_async(path)
+        if kind not in _RETRYABLE or attempt == OCR_MAX_ATTEMPTS:
+            return text, reason, kind, attempt
+        await asyncio.sleep(OCR_RETRY_BACKOFF_S * 2 ** (attempt - 1))
+    return None, reason, kind, OCR_MAX_ATTEMPTS
+
+
+_QUARANTINED_REASON = "quarantined: repeatedly timed out, crashed or ran out of memory"
+
+
+def release_quarantine(sha256: str) -> None:
+    """Let a quarantined file be extracted again (e.g. after fixing the OCR setup)."""
+    release_dead_letters(sha256)
+
+
+def extract_document(claim_id: int, document_id: int, path: Path) -> Optional[str]:
+    """Supervised extraction for one registered document.
+
+    On failure the document is dead-lettered, recorded as a failed_document
+    field for scoring and the summary, and None is returned so the caller can
+    move on to the next document.
+    """
+    sha = file_sha256(path)
+    if count_dead_letters(sha, QUARANTINE_KINDS, OCR_QUARANTINE_TTL_HOURS) >= OCR_QUARANTINE_AFTER:
+        text, reason, kind, attempts = None, _QUARANTINED_REASON, FAILURE_QUARANTINED, 0
+    else:
+        text, reason, kind, attempts = supervised_extract_text(path)
+    if kind is None:
+        return text
+    insert_dead_letter(claim_id, document_id, path.name, sha, reason, kind, attempts)
+    insert_extracted_field(claim_id, FAILED_DOCUMENT_FIELD, path.name, None, document_id=document_id)
+    log_audit("extraction_failed", f"{path.name}: {reason}", claim_id=claim_id, document_id=document_id)
+    return None
+
+
+async def extract_document_async(claim_id: int, document_id: int, path: Path) -> Optional[str]:
+    sha = await asyncio.to_thread(file_sha256, path)
+    if await count_dead_letters_async(sha, QUARANTINE_KINDS, OCR_QUARANTINE_TTL_HOURS) >= OCR_QUARANTINE_AFTER:
+        text, reason, kind, attempts = None, _QUARANTINED_REASON, FAILURE_QUARANTINED, 0
+    else:
+        text, reason, kind, attempts = await supervised_extract_text_async(path)
+    if kind is None:
+        return text
+    await insert_dead_letter_async(claim_id, document_id, path.name, sha, reason, kind, attempts)
+    await insert_extracted_fields_async(claim_id, document_id, [(FAILED_DOCUMENT_FIELD, path.name, None)])
+    await log_audit_async("extraction_failed", f"{path.name}: {reason}", claim_id=claim_id, document_id=document_id)
+    return None
+
+
+def _worker_main() -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Extract text from one document (supervised worker)")
+    parser.add_argument("--mem-mb", type=int, default=0)
+    parser.add_argument("--trace-out", default=None)
+    parser.add_argument("--release", metavar="SHA256", default=None, help="Release a quarantined file and exit")
+    parser.add_argument("path", nargs="?")
+    args = parser.parse_args()
+    if args.release:
+        release_quarantine(args.release)
+        print(f"released {args.release}")
+        return 0
+    if args.path is None:
+        parser.error("path is required")
+
+    if resource is not None and args.mem_mb > 0:
+        limit = args.mem_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    prof = Profiler("ocr-worker", sample=False) if args.trace_out else None
+    if prof is not None:
+        activate(prof)
+    try:
+        with span("ocr.extract", file=os.path.basename(args.path)):
+            text = extract_text(Path(args.path))
+    except MemoryError:
+        return _EXIT_MEMORY
+    except Exception as exc:
+        sys.stderr.write(f"{type(exc).__name__}: {exc}\n")
+        return _EXIT_ERROR
+    finally:
+        if prof is not None:
+            # Worker spans get their own track, keyed by the worker's pid
+            for event in prof.events:
+                event["tid"] = os.getpid()
+            with open(args.trace_out, "w", encoding="utf-8") as fh:
+                json.dump(prof.events, fh)
+    sys.stdout.buffer.write(text.encode("utf-8"))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(_worker_main())
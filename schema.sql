@@ -59,4 +59,58 @@ CREATE TABLE IF NOT EXISTS audit_logs (
   INDEX idx_audit_claim (claim_id)
 );
 
+-- Latest state per claim, maintained by app/db.py on every write
+CREATE TABLE IF NOT EXISTS claim_state (
+  claim_id BIGINT PRIMARY KEY,
+  claim_number VARCHAR(64) NOT NULL,
+  policy_holder VARCHAR(255) NOT NULL,
+  claim_type VARCHAR(64) NOT NULL,
+  score_id BIGINT NULL,
+  score INT NULL,
+  risk_level ENUM('LOW','MEDIUM','HIGH') NULL,
+  rule_hits JSON NULL,
+  summary_audit_id BIGINT NULL,
+  document_count INT NOT NULL DEFAULT 0,
+  updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  INDEX idx_claim_state_risk (risk_level, claim_id),
+  CONSTRAINT fk_claim_state_claim_id FOREIGN KEY (claim_id) REFERENCES claims(id) ON DELETE CASCADE
+);
+
+-- Deduplicated extracted field values per claim. field_value matches
+-- extracted_fields (TEXT); uniqueness is enforced on its SHA-256 so long values
+-- are neither truncated nor collapsed by INSERT IGNORE.
+CREATE TABLE IF NOT EXISTS claim_state_fields (
+  claim_id BIGINT NOT NULL,
+  field_name VARCHAR(128) NOT NULL,
+  field_value TEXT NOT NULL,
+  field_value_sha BINARY(32) AS (UNHEX(SHA2(field_value, 256))) STORED NOT NULL,
+  PRIMARY KEY (claim_id, field_name, field_value_sha),
+  CONSTRAINT fk_claim_state_fields_claim_id FOREIGN KEY (claim_id) REFERENCES claims(id) ON DELETE CASCADE
+);
 
+-- Documents whose text extraction failed after retries (timeouts, crashes, errors)
+CREATE TABLE IF NOT EXISTS dead_letters (
+  id BIGINT AUTO_INCREMENT PRIMARY KEY,
+  claim_id BIGINT NULL,
+  document_id BIGINT NULL,
+  file_name VARCHAR(512) NOT NULL,
+  file_sha256 CHAR(64) NOT NULL,
+  reason TEXT NOT NULL,
+  -- timeout | crash | memory | error | quarantined; see app/supervise.py
+  failure_kind VARCHAR(16) NOT NULL DEFAULT 'error',
+  attempts INT NOT NULL,
+  released TINYINT(1) NOT NULL DEFAULT 0,
+  created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  INDEX idx_dead_letters_sha (file_sha256)
+);
+-- Existing databases:
+-- ALTER TABLE dead_letters ADD COLUMN failure_kind VARCHAR(16) NOT NULL DEFAULT 'error' AFTER reason,
+--   ADD COLUMN released TINYINT(1) NOT NULL DEFAULT 0 AFTER attempts;
+
+-- High-water marks for incremental analytics exports (see app/export.py)
+CREATE TABLE IF NOT EXISTS export_watermarks (
+  name VARCHAR(128) PRIMARY KEY,
+  last_id BIGINT NOT NULL,
+  last_created_at TIMESTAMP NULL,
+  updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+);
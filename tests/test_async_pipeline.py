@@ -0,0 +1,51 @@
+import asyncio
+from pathlib import Path
+
+from app.async_pipeline import run_pipeline_async
+from app.db import fetchall, get_claim_id_by_number
+
+
+SAMPLES = Path(__file__).resolve().parents[1] / "samples" / "CLM-0001"
+
+
+def test_run_pipeline_async_concurrent_claims(tmp_path, monkeypatch):
+    monkeypatch.setenv("SQLITE_PATH", str(tmp_path / "t.db"))
+    monkeypatch.setenv("DISABLE_LLM", "1")
+
+    async def main():
+        return await asyncio.gather(*(
+            run_pipeline_async(f"CLM-ASYNC-{i}", "Jane Doe", "Auto", str(SAMPLES)) for i in range(5)
+        ))
+
+    summaries = asyncio.run(main())
+
+    assert all("DISABLE_LLM" in s for s in summaries)
+    for i in range(5):
+        claim_id = get_claim_id_by_number(f"CLM-ASYNC-{i}")
+        actions = [r["action"] for r in fetchall("SELECT action FROM audit_logs WHERE claim_id=%s", (claim_id,))]
+        assert actions.count("document_registered") == 3
+        assert actions[-1] == "llm_summary_generated"
+
+
+def test_gather_or_cancel_cancels_siblings_on_failure():
+    from app.steps import gather_or_cancel
+
+    finished = []
+
+    async def slow():
+        await asyncio.sleep(5)
+        finished.append("slow")
+
+    async def failing():
+        await asyncio.sleep(0)
+        raise ValueError("bad document")
+
+    async def main():
+        try:
+            await gather_or_cancel(slow(), failing())
+        except ValueError:
+            pass
+        await asyncio.sleep(0.05)
+
+    asyncio.run(main())
+    assert finished == []
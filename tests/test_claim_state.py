@@ -0,0 +1,83 @@
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from app import db
+from app.cli import run_pipeline
+from app.state import get_claim_state, get_claim_summary, list_claim_states
+
+
+SAMPLES = Path(__file__).resolve().parents[1] / "samples" / "CLM-0001"
+
+
+def test_claim_state_tracks_latest_writes(tmp_path, monkeypatch):
+    monkeypatch.setenv("SQLITE_PATH", str(tmp_path / "t.db"))
+    monkeypatch.setenv("DISABLE_LLM", "1")
+
+    run_pipeline("CLM-STATE", "Jane Doe", "Auto", str(SAMPLES))
+    run_pipeline("CLM-STATE", "Jane Doe", "Health", str(SAMPLES))
+
+    state = get_claim_state("CLM-STATE")
+    latest = db.fetchone("SELECT id, score FROM fraud_scores ORDER BY id DESC LIMIT 1")
+    assert state["claim_type"] == "Health"
+    assert state["document_count"] == 6
+    assert state["score"] == latest["score"]
+    assert sorted(state["fields"]["icd10_code"]) == ["M54.2", "S16.1"]
+    assert "DISABLE_LLM" in get_claim_summary("CLM-STATE")
+
+    before = db.fetchall("SELECT * FROM claim_state")
+    db.rebuild_claim_state()
+    after = db.fetchall("SELECT * FROM claim_state")
+    strip = lambda rows: [{k: v for k, v in r.items() if k != "updated_at"} for r in rows]
+    assert strip(before) == strip(after)
+
+
+def test_list_claim_states_paginates_and_filters(tmp_path, monkeypatch):
+    monkeypatch.setenv("SQLITE_PATH", str(tmp_path / "t.db"))
+    for i in range(5):
+        claim_id = db.insert_claim(f"CLM-P{i}", "Jane Doe", "Auto", None)
+        db.insert_fraud_score(claim_id, 10 * i, "HIGH" if i >= 3 else "LOW", {})
+
+    page = list_claim_states(limit=2)
+    assert [r["claim_number"] for r in page["items"]] == ["CLM-P0", "CLM-P1"]
+    page = list_claim_states(limit=2, after_id=page["next_after_id"])
+    assert [r["claim_number"] for r in page["items"]] == ["CLM-P2", "CLM-P3"]
+
+    high = list_claim_states(risk_level="high")
+    assert [r["claim_number"] for r in high["items"]] == ["CLM-P3", "CLM-P4"]
+    assert high["next_after_id"] is None
+
+
+@pytest.mark.parametrize("fast", [True, False])
+def test_base_and_state_writes_commit_together(tmp_path, monkeypatch, fast):
+    monkeypatch.setenv("SQLITE_PATH", str(tmp_path / "t.db"))
+    monkeypatch.setattr(db, "SQLITE_FAST", fast)
+
+    claim_id = db.insert_claim("CLM-UNIT", "Jane Doe", "Auto", None)
+    db.insert_document(claim_id, "a.txt", "txt", None)
+    assert get_claim_state("CLM-UNIT")["document_count"] == 1
+
+    with pytest.raises(Exception):
+        db.execute_unit([
+            ("one", "INSERT INTO documents (claim_id, file_name, file_type) VALUES (%s,%s,%s)", (claim_id, "b.txt", "txt")),
+            ("one", "UPDATE no_such_table SET x=1", ()),
+        ])
+    assert db.fetchone("SELECT COUNT(*) AS n FROM documents")["n"] == 1
+
+
+def test_claim_state_backfilled_once_for_existing_database(tmp_path, monkeypatch):
+    monkeypatch.setenv("SQLITE_PATH", str(tmp_path / "t.db"))
+    monkeypatch.setattr(db, "SQLITE_FAST", False)
+    db.insert_claim("CLM-OLD", "Jane Doe", "Auto", None)
+    # Simulate a database created before claim_state existed
+    conn = sqlite3.connect(str(tmp_path / "t.db"))
+    conn.execute("DELETE FROM claim_state")
+    conn.execute("PRAGMA user_version=0")
+    conn.commit()
+    conn.close()
+
+    assert get_claim_state("CLM-OLD")["claim_type"] == "Auto"
+    # Later connections neither re-run the backfill nor trip over its rows
+    db.insert_claim("CLM-NEW", "Jane Doe", "Auto", None)
+    assert [r["claim_number"] for r in list_claim_states()["items"]] == ["CLM-OLD", "CLM-NEW"]
@@ -0,0 +1,60 @@
+import threading
+
+import pytest
+
+from app import db
+
+
+pytestmark = pytest.mark.skipif(not (db.USE_SQLITE and db.SQLITE_FAST), reason="SQLite fast mode disabled")
+
+
+def test_concurrent_writes_and_reads(tmp_path, monkeypatch):
+    monkeypatch.setenv("SQLITE_PATH", str(tmp_path / "t.db"))
+    claim_id = db.insert_claim("CLM-CONC", "Jane Doe", "Auto", None)
+    errors = []
+
+    def worker(n: int):
+        try:
+            for i in range(25):
+                db.log_audit("test", f"{n}-{i}", claim_id=claim_id)
+                db.fetchone("SELECT COUNT(*) AS c FROM audit_logs WHERE claim_id=%s", (claim_id,))
+        except Exception as exc:  # pragma: no cover - surfaced by the assert below
+            errors.append(exc)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    row = db.fetchone("SELECT COUNT(*) AS c FROM audit_logs WHERE claim_id=%s", (claim_id,))
+    assert row["c"] == 200
+    assert db.fetchone("PRAGMA journal_mode")["journal_mode"] == "wal"
+
+
+def test_failed_write_does_not_poison_batch(tmp_path, monkeypatch):
+    monkeypatch.setenv("SQLITE_PATH", str(tmp_path / "t.db"))
+    db.insert_claim("CLM-DUP", "Jane Doe", "Auto", None)
+    with pytest.raises(Exception):
+        db.insert_claim("CLM-DUP", "Jane Doe", "Auto", None)
+    assert db.get_claim_id_by_number("CLM-DUP") is not None
+    assert db.insert_claim("CLM-NEXT", "Jane Doe", "Auto", None) > 0
+
+
+def test_dead_writer_fails_pending_and_is_replaced(tmp_path, monkeypatch):
+    monkeypatch.setenv("SQLITE_PATH", str(tmp_path / "t.db"))
+    db.insert_claim("CLM-W1", "Jane Doe", "Auto", None)
+    writer = db._get_writer()
+
+    def boom(conn, batch):
+        raise RuntimeError("writer crashed")
+
+    monkeypatch.setattr(writer, "_commit_batch", boom)
+    with pytest.raises(RuntimeError):
+        db.insert_claim("CLM-W2", "Jane Doe", "Auto", None)
+    writer._thread.join(timeout=5)
+    assert not writer.is_alive()
+
+    assert db.insert_claim("CLM-W3", "Jane Doe", "Auto", None) > 0
+    assert db._get_writer() is not writer
@@ -0,0 +1,67 @@
+import csv
+from decimal import Decimal
+
+import pytest
+
+from app import db
+from app.export import _ParquetSink, export_table, stream_table
+
+
+def _seed():
+    claim_id = db.insert_claim("CLM-EXP", "Jane Doe", "Auto", None)
+    db.insert_fraud_score(claim_id, 30, "MEDIUM", {"missing_claim_number": 20, "icd_codes_present": 5})
+    db.insert_fraud_score(claim_id, 10, "LOW", {"missing_policy_number": 10})
+    return claim_id
+
+
+def test_export_fraud_scores_flattens_rule_hits(tmp_path, monkeypatch):
+    monkeypatch.setenv("SQLITE_PATH", str(tmp_path / "t.db"))
+    _seed()
+
+    paths = export_table("fraud_scores", str(tmp_path / "out"), batch_size=1, rows_per_file=1)
+
+    assert [p.name for p in paths] == ["fraud_scores_1-1.csv", "fraud_scores_2-2.csv"]
+    with paths[0].open(newline="") as fh:
+        rows = list(csv.DictReader(fh))
+    assert rows[0]["claim_number"] == "CLM-EXP"
+    assert rows[0]["rule_missing_claim_number"] == "20"
+    assert rows[0]["rule_missing_policy_number"] == "0"
+
+
+def test_incremental_export_uses_watermark(tmp_path, monkeypatch):
+    monkeypatch.setenv("SQLITE_PATH", str(tmp_path / "t.db"))
+    claim_id = _seed()
+    out = str(tmp_path / "out")
+
+    assert len(export_table("fraud_scores", out, incremental=True)) == 1
+    assert export_table("fraud_scores", out, incremental=True) == []
+
+    db.insert_fraud_score(claim_id, 55, "HIGH", {"temporary_policy_number": 25})
+    paths = export_table("fraud_scores", out, incremental=True)
+    assert [p.name for p in paths] == ["fraud_scores_3-3.csv"]
+
+
+def test_rows_inserted_during_export_wait_for_next_run(tmp_path, monkeypatch):
+    monkeypatch.setenv("SQLITE_PATH", str(tmp_path / "t.db"))
+    claim_id = _seed()
+
+    columns, batches = stream_table("fraud_scores")
+    db.insert_fraud_score(claim_id, 55, "HIGH", {"temporary_policy_number": 25})
+    rows = [r for batch in batches for r in batch]
+
+    assert [r["id"] for r in rows] == [1, 2]
+    assert "rule_temporary_policy_number" not in [c for c, _ in columns]
+
+
+def test_parquet_sink_coerces_declared_types(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    path = tmp_path / "fields.parquet"
+    sink = _ParquetSink(path, [("id", "int"), ("confidence", "float"), ("field_value", "str")])
+    # MySQL hands back DECIMAL(5,4) confidence values as Decimal
+    sink.write([{"id": 1, "confidence": Decimal("0.9000"), "field_value": "CLM-EXP"},
+                {"id": 2, "confidence": None, "field_value": None}])
+    sink.close()
+
+    table = pq.read_table(str(path))
+    assert table.column("confidence").to_pylist() == [0.9, None]
+    assert table.column("field_value").to_pylist() == ["CLM-EXP", None]
@@ -0,0 +1,104 @@
+import asyncio
+import json
+import threading
+from pathlib import Path
+
+import pytest
+
+from app import cli, db, profiling, supervise
+from app.async_pipeline import run_pipeline_async
+from app.cli import run_pipeline
+
+
+SAMPLES = Path(__file__).resolve().parents[1] / "samples" / "CLM-0001"
+
+
+def test_span_is_noop_without_profiler():
+    assert profiling.span("db.execute", sql="SELECT 1") is profiling.span("other")
+
+
+def test_profiled_claim_writes_trace_linked_from_audit_log(tmp_path, monkeypatch, capsys):
+    monkeypatch.setenv("SQLITE_PATH", str(tmp_path / "t.db"))
+    monkeypatch.setenv("DISABLE_LLM", "1")
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path / "profiles"))
+
+    run_pipeline("CLM-PROF", "Jane Doe", "Auto", str(SAMPLES), profile=True)
+    run_pipeline("CLM-PROF", "Jane Doe", "Auto", str(SAMPLES), profile=False)
+
+    rows = db.fetchall("SELECT details FROM audit_logs WHERE action=%s", ("profile_captured",))
+    assert len(rows) == 1
+    trace = json.loads(Path(rows[0]["details"]).read_text())
+    names = {e["name"] for e in trace["traceEvents"] if e.get("pid") == 1}
+    assert {"pipeline", "ingest", "document", "fraud.score", "llm.generate", "db.execute", "db.fetchall"} <= names
+
+
+def test_async_profile_merges_ocr_worker_spans(tmp_path, monkeypatch):
+    monkeypatch.setenv("SQLITE_PATH", str(tmp_path / "t.db"))
+    monkeypatch.setenv("DISABLE_LLM", "1")
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path / "profiles"))
+    # Route .txt through the supervised worker so its spans are merged
+    monkeypatch.setattr(supervise, "SUPERVISED_EXTS", supervise.SUPERVISED_EXTS | {".txt"})
+
+    asyncio.run(run_pipeline_async("CLM-APROF", "Jane Doe", "Auto", str(SAMPLES), profile=True))
+
+    row = db.fetchone("SELECT details FROM audit_logs WHERE action=%s", ("profile_captured",))
+    trace = json.loads(Path(row["details"]).read_text())
+    names = [e["name"] for e in trace["traceEvents"]]
+    assert names.count("ocr.worker") == 3
+    assert names.count("ocr.extract") == 3
+
+
+
+def _improperly_nested(events):
+    # Spans on one track must be disjoint or nested for trace viewers
+    bad = 0
+    by_track = {}
+    for e in events:
+        if e.get("ph") == "X" and e["pid"] == 1:
+            by_track.setdefault(e["tid"], []).append((e["ts"], e["ts"] + e["dur"]))
+    for spans in by_track.values():
+        stack = []
+        for start, end in sorted(spans, key=lambda s: (s[0], -s[1])):
+            while stack and stack[-1] <= start:
+                stack.pop()
+            if stack and end > stack[-1]:
+                bad += 1
+            stack.append(end)
+    return bad
+
+
+def test_async_spans_nest_per_task_and_loop_thread_is_not_sampled(tmp_path, monkeypatch):
+    monkeypatch.setenv("SQLITE_PATH", str(tmp_path / "t.db"))
+    monkeypatch.setenv("DISABLE_LLM", "1")
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path / "profiles"))
+    loop_thread = []
+
+    async def main():
+        loop_thread.append(threading.get_ident())
+        await run_pipeline_async("CLM-NEST", "Jane Doe", "Auto", str(SAMPLES), profile=True)
+
+    asyncio.run(main())
+
+    row = db.fetchone("SELECT details FROM audit_logs WHERE action=%s", ("profile_captured",))
+    events = json.loads(Path(row["details"]).read_text())["traceEvents"]
+    assert _improperly_nested(events) == 0
+    assert not [e for e in events if e.get("pid") == 2 and e.get("tid") == loop_thread[0]]
+    tracks = {e["tid"] for e in events if e.get("ph") == "X" and e["name"] == "document"}
+    assert len(tracks) == 3
+
+
+def test_profile_captured_is_logged_when_pipeline_fails(tmp_path, monkeypatch):
+    monkeypatch.setenv("SQLITE_PATH", str(tmp_path / "t.db"))
+    monkeypatch.setenv("DISABLE_LLM", "1")
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path / "profiles"))
+
+    def boom(claim_id, claim):
+        raise RuntimeError("scoring failed")
+
+    monkeypatch.setattr(cli, "score_claim_fields", boom)
+    with pytest.raises(RuntimeError):
+        run_pipeline("CLM-FAIL", "Jane Doe", "Auto", str(SAMPLES), profile=True)
+
+    row = db.fetchone("SELECT claim_id, details FROM audit_logs WHERE action=%s", ("profile_captured",))
+    assert row["claim_id"] == db.get_claim_id_by_number("CLM-FAIL")
+    assert Path(row["details"]).exists()
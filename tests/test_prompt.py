@@ -0,0 +1,23 @@
+from app.prompt import build_prompt, dedupe_fields, estimate_tokens
+
+
+def test_dedupe_fields_keeps_first_occurrence():
+    deduped = dedupe_fields({"icd10_code": ["S16.1", "s16.1", "M54.2", ""], "claim_number": ["CLM-1", "CLM-1"]})
+    assert deduped == {"icd10_code": ["S16.1", "M54.2"], "claim_number": ["CLM-1"]}
+
+
+def test_build_prompt_prefers_relevant_windows_within_budget():
+    boilerplate = "\n".join(f"Terms and conditions clause {i} applies to all policies." for i in range(200))
+    medical = "Patient: Jane Doe\nICD-10: S16.1, M54.2\nTreatment: Rest"
+    structured = {"icd10_code": ["S16.1", "M54.2", "S16.1"], "claim_number": ["CLM-1"]}
+
+    prompt, stats = build_prompt(
+        "CLM-1", "Jane Doe", "Auto", "Rear-end collision at intersection",
+        structured, 5, "LOW", {"icd_codes_present": 5}, [boilerplate, medical],
+        token_budget=400,
+    )
+
+    assert "ICD-10: S16.1, M54.2" in prompt
+    assert "clause 150" not in prompt
+    assert '"icd10_code":["S16.1","M54.2"]' in prompt
+    assert stats["prompt_tokens"] == estimate_tokens(prompt) <= 400
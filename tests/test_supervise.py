@@ -0,0 +1,78 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+from app import db, supervise
+from app.cli import build_structured_map
+
+
+def test_timeout_is_retried_then_dead_lettered_and_quarantined(tmp_path, monkeypatch):
+    monkeypatch.setenv("SQLITE_PATH", str(tmp_path / "t.db"))
+    monkeypatch.setattr(supervise, "OCR_TIMEOUT_S", 0.5)
+    monkeypatch.setattr(supervise, "OCR_RETRY_BACKOFF_S", 0)
+    monkeypatch.setattr(supervise, "OCR_MAX_ATTEMPTS", 2)
+    monkeypatch.setattr(supervise, "OCR_QUARANTINE_AFTER", 1)
+    monkeypatch.setattr(supervise, "_worker_command", lambda path: [sys.executable, "-c", "import time; time.sleep(30)"])
+
+    scan = tmp_path / "scan.png"
+    scan.write_bytes(b"not really a png")
+    claim_id = db.insert_claim("CLM-SUP", "Jane Doe", "Health", None)
+    doc_id = db.insert_document(claim_id, scan.name, "png", None)
+
+    assert supervise.extract_document(claim_id, doc_id, scan) is None
+    row = db.fetchone("SELECT reason, failure_kind, attempts FROM dead_letters WHERE document_id=%s", (doc_id,))
+    assert row["reason"].startswith("timeout") and row["failure_kind"] == "timeout" and row["attempts"] == 2
+    assert build_structured_map(claim_id)["failed_document"] == ["scan.png"]
+
+    assert supervise.extract_document(claim_id, doc_id, scan) is None
+    rows = db.fetchall("SELECT reason, failure_kind, attempts FROM dead_letters ORDER BY id")
+    assert rows[-1]["failure_kind"] == "quarantined" and rows[-1]["attempts"] == 0
+
+    # Released files are tried again
+    supervise.release_quarantine(supervise.file_sha256(scan))
+    monkeypatch.setattr(supervise, "_worker_command", lambda path: [sys.executable, "-c", "print('ok')"])
+    assert supervise.extract_document(claim_id, doc_id, scan).strip() == "ok"
+
+
+def test_worker_error_is_not_retried(tmp_path, monkeypatch):
+    monkeypatch.setattr(supervise, "_worker_command", lambda path: [sys.executable, "-c", "import sys; sys.stderr.write('bad file'); sys.exit(2)"])
+    text, reason, kind, attempts = supervise.supervised_extract_text(tmp_path / "x.pdf")
+    assert text is None
+    assert reason == "extraction error: bad file"
+    assert kind == "error"
+    assert attempts == 1
+
+
+def test_extraction_errors_do_not_quarantine(tmp_path, monkeypatch):
+    monkeypatch.setenv("SQLITE_PATH", str(tmp_path / "t.db"))
+    monkeypatch.setattr(supervise, "OCR_QUARANTINE_AFTER", 1)
+    monkeypatch.setattr(supervise, "_worker_command", lambda path: [sys.executable, "-c", "import sys; sys.stderr.write('pdf2image not installed'); sys.exit(2)"])
+    scan = tmp_path / "scan.pdf"
+    scan.write_bytes(b"%PDF-1.4")
+    claim_id = db.insert_claim("CLM-ENV", "Jane Doe", "Health", None)
+
+    for _ in range(2):
+        assert supervise.extract_document(claim_id, None, scan) is None
+    kinds = [r["failure_kind"] for r in db.fetchall("SELECT failure_kind FROM dead_letters ORDER BY id")]
+    assert kinds == ["error", "error"]
+
+
+@pytest.mark.skipif(os.name != "posix", reason="process groups are POSIX-only")
+def test_cancelled_extraction_kills_worker(tmp_path, monkeypatch):
+    pid_file = tmp_path / "worker.pid"
+    script = f"import os, time; open({str(pid_file)!r}, 'w').write(str(os.getpid())); time.sleep(30)"
+    monkeypatch.setattr(supervise, "_worker_command", lambda path: [sys.executable, "-c", script])
+
+    async def main():
+        task = asyncio.create_task(supervise.supervised_extract_text_async(tmp_path / "x.pdf"))
+        while not pid_file.exists() or not pid_file.read_text():
+            await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(main())
+    with pytest.raises(ProcessLookupError):
+        os.kill(int(pid_file.read_text()), 0)
@@ -2,7 +2,6 @@ import os
 import tempfile
 from pathlib import Path
 import sys
-import json
 
 try:
     import streamlit as st  # type: ignore[import-not-found]
@@ -15,7 +14,7 @@ if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
 from app.cli import run_pipeline
-from app.db import get_claim_id_by_number, fetchone
+from app.state import get_claim_state
 
 
 st.set_page_config(page_title="Claims IDP", layout="centered")
@@ -65,26 +64,12 @@ if submitted:
 
         # Fraud scorecard display
         try:
-            claim_id = get_claim_id_by_number(claim_number)
-            score_row = None
-            if claim_id:
-                score_row = fetchone(
-                    "SELECT score, risk_level, rule_hits FROM fraud_scores WHERE claim_id=%s ORDER BY id DESC LIMIT 1",
-                    (claim_id,)
-                )
-            if score_row:
-                score = score_row["score"] if isinstance(score_row, dict) else score_row[0]
-                risk = score_row["risk_level"] if isinstance(score_row, dict) else score_row[1]
-                hits_raw = score_row["rule_hits"] if isinstance(score_row, dict) else score_row[2]
-                try:
-                    hits = json.loads(hits_raw) if isinstance(hits_raw, (str, bytes)) else hits_raw
-                except Exception:
-                    hits = {"raw": str(hits_raw)}
-
+            state = get_claim_state(claim_number)
+            if state and state.get("score") is not None:
                 st.subheader("Fraud Scorecard")
-                st.metric(label="Fraud Score", value=int(score), delta=risk)
+                st.metric(label="Fraud Score", value=int(state["score"]), delta=state["risk_level"])
                 st.write("Rule hits:")
-                st.json(hits or {})
+                st.json(state.get("rule_hits") or {})
             else:
                 st.info("No fraud score available for this claim yet.")
         except Exception as e: